@@ -5,18 +5,42 @@
 # It reads feed URLs from a file, parses each feed to retrieve entries, cleans
 # redirected links to get the actual URLs, and saves them to an output file.
 # Logging with loguru is included for monitoring the process.
-
+#
+# The feeds are downloaded concurrently with the shared pooled HTTP client
+# (at most FETCH_CONCURRENCY at a time) and parsed in a pool of worker
+# processes, so a refresh of hundreds of feeds no longer takes minutes.
+# Downloads are conditional (ETag / Last-Modified, see
+# app.scraping.feed_fetch): feeds that did not change since the last refresh
+# are neither downloaded again nor parsed. The cleaned URLs of the changed
+# feeds that are not in the persistent URL index yet are appended to the
+# output as each feed is parsed.
+
+import asyncio
 import feedparser
 import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
 from loguru import logger
 import os
 
+from app.scraping.feed_fetch import commit_feed, fetch_feed
+from app.scraping.http_client import close_http_client
+from app.models.url_index import SITES, get_url_index
+
 # Path to the file containing Google Alerts RSS feed URLs
 FEEDS_FILE_PATH = "./data/google_alert_rss.txt"
 
 # Path to the file where the extracted real URLs will be saved
 URLS_FILE_PATH = "./data/urls_cybersecurity_ot_it.txt"
 
+# Feeds downloaded at the same time
+FETCH_CONCURRENCY = 16
+
+# Consumer name of the alert refresh in the feed cache
+FEED_CONSUMER = "google_alerts"
+
+# Worker processes parsing the downloaded feeds
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
 
 def clean_google_redirect_url(url: str) -> str:
     '''
@@ -37,20 +61,145 @@ def clean_google_redirect_url(url: str) -> str:
     return real_url
 
 
+def read_feed_urls(path: str = FEEDS_FILE_PATH) -> list[str]:
+    '''
+    @brief Reads the Google Alerts feed URLs from a file.
+
+    @param path: File with one feed URL per line. Lines may optionally
+    contain additional info after a '|' character, which is ignored.
+    @return: List of feed URLs.
+    '''
+    feed_urls = []
+    with open(path, "r", encoding="utf-8") as feeds_file:
+        for line in feeds_file:
+            line = line.strip()
+            if not line:
+                continue
+            feed_urls.append(line.split('|')[0].strip())
+    return feed_urls
+
+
+def parse_feed_links(body: bytes, content_type: str = "") -> tuple[str, list[str]]:
+    '''
+    @brief Parses a downloaded feed and returns its cleaned entry links.
+
+    Runs in the worker processes, so it only returns plain strings.
+
+    @param body: Raw feed document.
+    @param content_type: Content-Type header of the response, used by
+    `feedparser` to detect the encoding.
+    @return: Feed title and real destination URLs of the feed entries.
+    '''
+    feed = feedparser.parse(body, response_headers={"content-type": content_type})
+    links = [
+        clean_google_redirect_url(entry.get("link"))
+        for entry in feed.entries
+        if entry.get("link")
+    ]
+    return feed.feed.get("title", ""), links
+
+
+async def fetch_feed_links(
+    feed_url: str,
+    semaphore: asyncio.Semaphore,
+    pool: ProcessPoolExecutor,
+) -> list[str] | None:
+    '''
+    @brief Downloads one feed and parses it in the worker pool.
+
+    @param feed_url: URL of the feed.
+    @param semaphore: Bounds the number of feeds downloaded at once.
+    @param pool: Worker processes parsing the feeds.
+    @return: Cleaned entry links (empty if the feed failed or has none), or
+    None if the feed did not change since the last refresh.
+    '''
+    try:
+        async with semaphore:
+            fetch = await fetch_feed(feed_url, FEED_CONSUMER)
+        if not fetch.changed:
+            return None
+
+        loop = asyncio.get_running_loop()
+        title, links = await loop.run_in_executor(
+            pool, parse_feed_links, fetch.body, fetch.content_type
+        )
+    except Exception as e:
+        logger.warning(f"Error reading feed {feed_url}: {e}")
+        return []
+
+    if not links:
+        logger.warning(f"No entries found in: {feed_url}")
+        return links
+    commit_feed(fetch, title)
+    return links
+
+
+async def fetch_and_save_alert_urls_async(
+    feed_urls: list[str],
+    output_path: str = URLS_FILE_PATH,
+) -> int:
+    '''
+    @brief Downloads and parses the feeds concurrently and saves their URLs.
+
+    The URLs of every changed feed are appended to the output as soon as it
+    has been parsed, except those already in the URL index ("sites"
+    namespace); unchanged feeds are skipped.
+
+    @param feed_urls: Google Alerts feed URLs.
+    @param output_path: File where the extracted URLs are saved.
+    @return: Number of URLs saved.
+    '''
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    url_index = get_url_index()
+    total = 0
+    unchanged = 0
+
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as pool, \
+            open(output_path, "a", encoding="utf-8") as f:
+        tasks = [fetch_feed_links(feed_url, semaphore, pool) for feed_url in feed_urls]
+        for done in asyncio.as_completed(tasks):
+            links = await done
+            if links is None:
+                unchanged += 1
+                continue
+            new_links = url_index.add_many(links, SITES)
+            for url in new_links:
+                f.write(url + "\n")
+            f.flush()
+            total += len(new_links)
+
+    logger.info(f"{unchanged}/{len(feed_urls)} feeds unchanged since the last refresh")
+    return total
+
+
+async def _run_alert_refresh(feed_urls: list[str]) -> int:
+    try:
+        return await fetch_and_save_alert_urls_async(feed_urls)
+    finally:
+        # The client belongs to the loop created by asyncio.run()
+        await close_http_client()
+
+
 def fetch_and_save_alert_urls():
     '''
     @brief Parses Google Alerts RSS feeds and extracts the real destination
     URLs.
 
-    This function reads RSS feed URLs from a file, parses each feed using
-    `feedparser`, and extracts the actual destination URLs from redirect links
-    (typical in Google Alerts). It removes any redirect/tracking wrappers,
-    cleans the URLs, and writes the final list to a specified output file.
+    This function reads RSS feed URLs from a file, downloads the feeds
+    concurrently with a pooled HTTP client (conditional requests, so feeds
+    that did not change are skipped), parses them with `feedparser` in
+    a pool of worker processes, and extracts the actual destination URLs from
+    redirect links (typical in Google Alerts). It removes any
+    redirect/tracking wrappers, cleans the URLs, and appends them to the
+    specified output file.
 
     The input file (defined by FEEDS_FILE_PATH) should contain one feed URL
     per line. Lines may optionally contain additional info after
     a '|' character, which will be ignored.
 
+    It runs its own event loop, so it is meant to be called from a worker
+    thread (e.g. the recurring scheduler timer), not from a coroutine.
+
     @note Uses the `clean_google_redirect_url()` helper to extract real URLs
     from redirect links.
     @note Logs progress and warnings using the `loguru` logger.
@@ -63,38 +212,13 @@ def fetch_and_save_alert_urls():
 
     os.makedirs(os.path.dirname(URLS_FILE_PATH), exist_ok=True)
 
-    total_urls = []
-
-    # Read only the clean URL before a possible '|' separator
-    with open(FEEDS_FILE_PATH, "r", encoding="utf-8") as feeds_file:
-        feed_urls = []
-        for line in feeds_file:
-            line = line.strip()
-            if not line:
-                continue
-            url_only = line.split('|')[0].strip()
-            feed_urls.append(url_only)
-
-    for feed_url in feed_urls:
-        logger.info(f"Reading feed: {feed_url}")
-        feed = feedparser.parse(feed_url)
+    feed_urls = read_feed_urls(FEEDS_FILE_PATH)
+    logger.info(f"Reading {len(feed_urls)} feeds...")
 
-        if not feed.entries:
-            logger.warning(f"No entries found in: {feed_url}")
-            continue
+    total = asyncio.run(_run_alert_refresh(feed_urls))
 
-        for entry in feed.entries:
-            link = entry.get("link")
-            if link:
-                clean_url = clean_google_redirect_url(link)
-                total_urls.append(clean_url)
-
-    if not total_urls:
-        logger.warning("No valid URLs were extracted from any feed.")
+    if not total:
+        logger.warning("No new URLs were extracted from any feed.")
         return
 
-    with open(URLS_FILE_PATH, "w", encoding="utf-8") as f:
-        for url in total_urls:
-            f.write(url + "\n")
-
-    logger.info(f"{len(total_urls)} URLs saved to {URLS_FILE_PATH}")
+    logger.info(f"{total} URLs saved to {URLS_FILE_PATH}")
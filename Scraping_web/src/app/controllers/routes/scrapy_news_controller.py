@@ -26,10 +26,13 @@ from app.models.pydantic import FeedUrlRequest, SaveLinkResponse
 from app.scraping.feeds_gd import run_dork_search_feed
 from app.scraping.news_gd import run_news_search
 from app.scraping.spider_factory import run_dynamic_spider_from_db
+from app.scraping.feed_fetch import commit_feed, fetch_feed
+from app.scraping.crawl_profiles import load_crawl_profile
 from loguru import logger
 import threading
 
 from app.controllers.google_alerts_pages import fetch_and_save_alert_urls
+from app.utils.jsonl_store import lock_metrics
 
 router = APIRouter(
     prefix="/newsSpider",
@@ -43,6 +46,8 @@ router = APIRouter(
 )
 
 LINKS_FILE = Path("./data/google_alert_rss.txt")
+# Consumer name of the feed validation in the feed cache
+FEED_CONSUMER = "saved_links"
 
 @router.post("/save-feed-google-alerts", response_model=SaveLinkResponse)
 async def guardar_link(feed_req: FeedUrlRequest) -> SaveLinkResponse:
@@ -52,7 +57,8 @@ async def guardar_link(feed_req: FeedUrlRequest) -> SaveLinkResponse:
     This asynchronous POST endpoint receives a feed URL in the request body,
     validates the feed by parsing it with `feedparser`, and extracts the feed t
     itle.    If the feed is invalid or contains no entries, it raises an HTTP 4
-    00 error.
+    00 error. The feed is downloaded with a conditional GET: a feed already
+    validated that did not change is not parsed again.
 
     Upon successful validation, it appends the feed URL and title to a
     designated file.
@@ -65,12 +71,21 @@ async def guardar_link(feed_req: FeedUrlRequest) -> SaveLinkResponse:
     url = str(feed_req.feed_url)
 
     try:
-        feed = feedparser.parse(url)
+        fetch = await fetch_feed(url, FEED_CONSUMER)
 
-        if not feed.entries:
-            raise ValueError("No entries found in the feed")
+        if fetch.changed:
+            feed = feedparser.parse(
+                fetch.body, response_headers={"content-type": fetch.content_type}
+            )
+
+            if not feed.entries:
+                raise ValueError("No entries found in the feed")
 
-        title = feed.feed.get("title", "Untitled")
+            title = feed.feed.get("title", "Untitled")
+            commit_feed(fetch, title)
+        else:
+            # Already validated and unchanged since then
+            title = fetch.cached_title or "Untitled"
 
     except Exception as e:
         raise HTTPException(
@@ -111,7 +126,10 @@ async def scrape_news_articles(request: Request) -> dict[str, str]:
     """
     try:
         pool = request.app.state.pool
-        asyncio.create_task(run_dynamic_spider_from_db(pool))
+        output_writer = getattr(request.app.state, "output_writer", None)
+        output_queue = output_writer.queue if output_writer else None
+        spider_pool = getattr(request.app.state, "spider_pool", None)
+        asyncio.create_task(run_dynamic_spider_from_db(pool, output_queue, spider_pool))
         return {"status": "News processing started"}
     except Exception as e:
         logger.error(f"Scraping failed: {e}")
@@ -121,6 +139,46 @@ async def scrape_news_articles(request: Request) -> dict[str, str]:
         )
 
 
+@router.get("/output-metrics")
+async def output_store_metrics(request: Request) -> dict:
+    '''
+    @brief Returns the lock metrics of the scraped output store.
+
+    @details Reports how often writers had to wait for the store lock and for
+    how long, both for the writers running in the API process and for the
+    output writer process fed by the spiders.
+
+    @param request: FastAPI request object, used to reach the output writer.
+    @return: Dictionary with the metrics of each writer.
+    '''
+    output_writer = getattr(request.app.state, "output_writer", None)
+    return {
+        "api_process": lock_metrics.snapshot(),
+        "writer_process": output_writer.metrics() if output_writer else None,
+    }
+
+
+@router.get("/spider-pool")
+async def spider_pool_stats(request: Request) -> dict:
+    '''
+    @brief Returns the statistics of the spider worker pool.
+
+    @details For every worker slot: whether its crawler process is running,
+    how many crawls it ran and retried after a failure, URLs assigned and
+    fetched, busy time, pages per second and the report of its last crawl,
+    together with the crawl profile in use.
+
+    @param request: FastAPI request object, used to reach the worker pool.
+    @return: Dictionary with the crawl profile, the pool size and the stats
+    of each worker.
+    '''
+    profile, _ = load_crawl_profile()
+    spider_pool = getattr(request.app.state, "spider_pool", None)
+    if spider_pool is None:
+        return {"profile": profile, "size": 0, "workers": []}
+    return {"profile": profile, "size": spider_pool.size, "workers": spider_pool.stats()}
+
+
 @router.get("/start-google-alerts")
 async def start_google_alert_scheduler(request: Request) -> JSONResponse:
     """
@@ -1,6 +1,6 @@
 ## \file etiquetas_api.py
 ## \brief REST API to process a JSON file using entity analysis with spaCy.
-## \details This endpoint reads a `result.json` file, processes it to extract named entities,
+## \details This endpoint reads a `result.jsonl` store, processes it to extract named entities,
 ## and returns a generated `labels_result.json` file.
 
 
@@ -15,7 +15,7 @@ router = APIRouter(
     tags=["spacy"],
     responses={
         200: {"description": "Processed file returned successfully"},
-        404: {"description": "Input file result.json not found"},
+        404: {"description": "Input file result.jsonl not found"},
         500: {"description": "Failed to generate output file labels_result.json"}
     }
 )
@@ -30,16 +30,16 @@ async def start_background_loop():
         dict: Status message confirming that the recurring task has been initiated.
 
     Raises:
-        HTTPException: If the input file `result.json` is not found.
+        HTTPException: If the input file `result.jsonl` is not found.
     """
-    input_path = "./outputs/result.json"
+    input_path = "./outputs/result.jsonl"
     output_path = "./outputs/labels_result.json"
 
     if not os.path.exists(input_path):
-        logger.warning("[Startup] Input file result.json not found. Aborting scheduler.")
+        logger.warning("[Startup] Input file result.jsonl not found. Aborting scheduler.")
         raise HTTPException(
             status_code=404,
-            detail="File result.json not found"
+            detail="File result.jsonl not found"
         )
 
     threading.Thread(
@@ -57,11 +57,11 @@ def background_process_every_24h(input_path: str, output_path: str):
     Executes the JSON NLP processing task and schedules the next execution after 24 hours.
 
     Args:
-        input_path (str): Path to the input JSON file with raw news/texts.
+        input_path (str): Path to the input JSON Lines store with raw news/texts.
         output_path (str): Path to save the output file with extracted SpaCy labels.
     """
     try:
-        logger.info("[SpaCy] Starting entity labeling on result.json...")
+        logger.info("[SpaCy] Starting entity labeling on result.jsonl...")
         process_json(input_path, output_path)
         logger.success("[SpaCy] Entity labeling completed. Output saved to labels_result.json")
     except Exception as e:
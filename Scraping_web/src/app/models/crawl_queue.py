@@ -0,0 +1,273 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 18:40:51
+# @ Project: Cebolla
+# @ Description: Durable crawl queue stored in PostgreSQL.
+#
+# The unread entries of TT-RSS are copied into the `crawl_jobs` table, one
+# job per link. Workers (spider processes, possibly on several nodes) lease
+# batches of jobs with `FOR UPDATE SKIP LOCKED`, so two workers never get
+# the same job and none of them waits for the rows locked by another.
+#
+# A leased job stays 'pending' but becomes invisible until `available_at`
+# (the lease timeout): if its worker dies, the job comes back on its own.
+# On success the job is acknowledged ('done'); on failure it is made
+# available again after an exponential backoff, until MAX_ATTEMPTS is
+# reached ('failed').
+
+from typing import Dict, List, Optional
+
+from asyncpg import Connection
+
+from app.models.ttrss_postgre_db import get_owner_uid
+
+# Unread entries copied per statement by enqueue_unread_entries
+ENTRY_CHUNK_SIZE = 500
+# Seconds a leased job stays invisible to the other workers
+LEASE_SECONDS = 2 * 3600
+# Attempts before a job is given up
+MAX_ATTEMPTS = 5
+# Delay before the first retry (seconds), doubled at every attempt
+RETRY_BACKOFF = 600
+
+# Domain of a job URL (host and port), used to shard the leases
+_DOMAIN_SQL = "coalesce(lower(substring(url from '^[^:/?#]+://([^/?#]+)')), url)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    id           BIGSERIAL PRIMARY KEY,
+    entry_id     INTEGER,
+    url          TEXT NOT NULL UNIQUE,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    available_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    leased_by    TEXT,
+    last_error   TEXT,
+    created_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS crawl_jobs_available_idx
+    ON crawl_jobs (available_at, id) WHERE status = 'pending';
+"""
+
+
+async def ensure_crawl_queue(conn: Connection) -> None:
+    """
+    Create the crawl_jobs table and its index if they do not exist.
+
+    Args:
+        conn (Connection): Active database connection.
+    """
+    await conn.execute(_SCHEMA)
+
+
+async def enqueue_unread_entries(
+    conn: Connection,
+    chunk_size: int = ENTRY_CHUNK_SIZE
+) -> int:
+    """
+    Add a job for every unread entry link of the admin user.
+
+    The entries are copied server-side with INSERT ... SELECT, in keyset
+    chunks ordered by entry id; links that already have a job are skipped.
+    Entries whose link was already crawled by a finished job are marked as
+    viewed.
+
+    Args:
+        conn (Connection): Active database connection.
+        chunk_size (int): Entries copied per statement.
+
+    Returns:
+        int: Number of new jobs.
+    """
+    owner_uid = await get_owner_uid(conn)
+    last_id = 0
+    inserted = 0
+    while True:
+        row = await conn.fetchrow(
+            """
+            WITH chunk AS (
+                SELECT e.id, e.link
+                FROM ttrss_entries e
+                JOIN ttrss_user_entries u ON u.ref_id = e.id
+                WHERE e.link IS NOT NULL
+                  AND u.owner_uid = $1
+                  AND u.unread = TRUE
+                  AND e.id > $2
+                ORDER BY e.id
+                LIMIT $3
+            ), added AS (
+                INSERT INTO crawl_jobs (entry_id, url)
+                SELECT id, link FROM chunk
+                ON CONFLICT (url) DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT max(id) FROM chunk) AS last_id,
+                   (SELECT count(*) FROM chunk) AS scanned,
+                   (SELECT count(*) FROM added) AS inserted
+            """,
+            owner_uid,
+            last_id,
+            chunk_size
+        )
+        inserted += row["inserted"]
+        if row["scanned"] < chunk_size:
+            break
+        last_id = row["last_id"]
+
+    await conn.execute(
+        """
+        UPDATE ttrss_user_entries u
+        SET unread = FALSE
+        FROM ttrss_entries e, crawl_jobs j
+        WHERE u.ref_id = e.id
+          AND u.owner_uid = $1
+          AND u.unread = TRUE
+          AND j.url = e.link
+          AND j.status = 'done'
+        """,
+        owner_uid
+    )
+    return inserted
+
+
+async def lease_jobs(
+    conn: Connection,
+    limit: int,
+    worker: str,
+    lease_seconds: int = LEASE_SECONDS,
+    shard: Optional[int] = None,
+    shards: int = 1
+) -> List[Dict]:
+    """
+    Lease a batch of available jobs.
+
+    Rows locked by another worker are skipped (FOR UPDATE SKIP LOCKED). The
+    leased jobs are hidden for `lease_seconds` and their attempt counter is
+    increased. With a shard, only the jobs whose domain hashes to it are
+    leased, so every page of a domain goes to the same worker slot.
+
+    Args:
+        conn (Connection): Active database connection.
+        limit (int): Maximum number of jobs.
+        worker (str): Identifier of the worker, stored for monitoring.
+        lease_seconds (int): Seconds before the jobs come back if they are
+            neither acknowledged nor failed.
+        shard (int, optional): Shard to lease from, from 0 to shards - 1.
+        shards (int): Number of shards the domains are split into.
+
+    Returns:
+        List[dict]: Leased jobs with id, entry_id, url and attempts.
+    """
+    shard_filter = ""
+    if shard is not None:
+        shard_filter = f"AND mod(hashtext({_DOMAIN_SQL})::bigint + 2147483648, $4) = $5"
+    rows = await conn.fetch(
+        f"""
+        WITH next AS (
+            SELECT id
+            FROM crawl_jobs
+            WHERE status = 'pending'
+              AND available_at <= now()
+              {shard_filter}
+            ORDER BY available_at, id
+            LIMIT $1
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE crawl_jobs j
+        SET attempts = j.attempts + 1,
+            available_at = now() + make_interval(secs => $2),
+            leased_by = $3,
+            updated_at = now()
+        FROM next
+        WHERE j.id = next.id
+        RETURNING j.id, j.entry_id, j.url, j.attempts
+        """,
+        limit,
+        float(lease_seconds),
+        worker,
+        *((shards, shard) if shard is not None else ())
+    )
+    return [dict(row) for row in rows]
+
+
+async def ack_jobs(conn: Connection, job_ids: List[int]) -> None:
+    """
+    Mark jobs as successfully done.
+
+    Args:
+        conn (Connection): Active database connection.
+        job_ids (list[int]): Ids of the jobs.
+    """
+    if not job_ids:
+        return
+    await conn.execute(
+        """
+        UPDATE crawl_jobs
+        SET status = 'done', leased_by = NULL, last_error = NULL, updated_at = now()
+        WHERE id = ANY($1::bigint[])
+        """,
+        list(job_ids)
+    )
+
+
+async def fail_jobs(
+    conn: Connection,
+    job_ids: List[int],
+    error: str,
+    max_attempts: int = MAX_ATTEMPTS,
+    backoff: int = RETRY_BACKOFF
+) -> None:
+    """
+    Release failed jobs: they become available again after an exponential
+    backoff (backoff * 2^(attempts - 1)), or are given up after
+    `max_attempts`.
+
+    Args:
+        conn (Connection): Active database connection.
+        job_ids (list[int]): Ids of the jobs.
+        error (str): Reason of the failure, stored in last_error.
+        max_attempts (int): Attempts before a job is marked 'failed'.
+        backoff (int): Delay before the first retry, in seconds.
+    """
+    if not job_ids:
+        return
+    await conn.execute(
+        """
+        UPDATE crawl_jobs
+        SET status = CASE WHEN attempts >= $3 THEN 'failed' ELSE 'pending' END,
+            available_at = now() + make_interval(secs => $4 * power(2, attempts - 1)),
+            leased_by = NULL,
+            last_error = $2,
+            updated_at = now()
+        WHERE id = ANY($1::bigint[])
+        """,
+        list(job_ids),
+        error,
+        max_attempts,
+        float(backoff)
+    )
+
+
+async def crawl_queue_stats(conn: Connection) -> Dict[str, int]:
+    """
+    Count the jobs per status.
+
+    Args:
+        conn (Connection): Active database connection.
+
+    Returns:
+        dict: Number of jobs per status ('leased' counts the pending jobs
+        currently hidden by a lease or a backoff).
+    """
+    rows = await conn.fetch(
+        """
+        SELECT CASE
+                   WHEN status = 'pending' AND available_at > now() THEN 'leased'
+                   ELSE status
+               END AS state,
+               count(*) AS jobs
+        FROM crawl_jobs
+        GROUP BY 1
+        """
+    )
+    return {row["state"]: row["jobs"] for row in rows}
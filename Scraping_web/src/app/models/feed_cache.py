@@ -0,0 +1,184 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 17:05:36
+# @ Project: Cebolla
+# @ Description: Persistent cache of the feed fetches (SQLite).
+#
+# For each consumer and feed URL the cache keeps the validators returned by
+# the server (ETag and Last-Modified), a hash of the last processed body and
+# the feed title. Fetches send the validators back (If-None-Match /
+# If-Modified-Since), so an unchanged feed costs a 304 with no body, and a
+# body whose hash did not change is not parsed again. Entries are only
+# written once a feed has been processed successfully.
+#
+# The same feed can be read by several consumers (the saved links, the RSS
+# feeds inserted into TinyTinyRSS, the Google Alerts), each with its own
+# processing: entries are kept per consumer, so a feed processed by one of
+# them is still new to the others.
+
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+# Location of the cache database
+FEED_CACHE_FILE = "./data/feed_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feed_cache (
+    consumer      TEXT NOT NULL,
+    url           TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    body_hash     TEXT,
+    title         TEXT,
+    updated_at    REAL NOT NULL,
+    PRIMARY KEY (consumer, url)
+)
+"""
+
+# Shared caches keyed by (pid, path)
+_caches: dict = {}
+_caches_lock = threading.Lock()
+
+
+class CachedFeed(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: Optional[str]
+    title: Optional[str]
+
+
+class FeedCache:
+    """
+    SQLite table with the last successful fetch of every feed URL, per
+    consumer.
+
+    The connection is shared by the threads of a process and serialized
+    with a lock; WAL mode lets several processes use the same file.
+    """
+
+    def __init__(self, path: str = FEED_CACHE_FILE):
+        """
+        Args:
+            path (str): Path of the SQLite database.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(feed_cache)")]
+        if columns and "consumer" not in columns:
+            # Entries of the former table are not tied to a consumer: they
+            # are dropped, so each consumer fetches its feeds in full once
+            self._conn.execute("DROP TABLE feed_cache")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def get(self, consumer: str, url: str) -> Optional[CachedFeed]:
+        """
+        Return the cached entry of a feed.
+
+        Args:
+            consumer (str): Name of the consumer processing the feed.
+            url (str): Feed URL.
+
+        Returns:
+            CachedFeed | None: Cached validators, body hash and title, or
+            None if the feed was never processed by the consumer.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body_hash, title FROM feed_cache "
+                "WHERE consumer = ? AND url = ?",
+                (consumer, url),
+            ).fetchone()
+        return CachedFeed(*row) if row else None
+
+    def conditional_headers(self, consumer: str, url: str) -> dict:
+        """
+        Build the conditional request headers of a feed.
+
+        Args:
+            consumer (str): Name of the consumer processing the feed.
+            url (str): Feed URL.
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (empty if the
+            feed is not cached for the consumer).
+        """
+        cached = self.get(consumer, url)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def store(
+        self,
+        consumer: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        body_hash: Optional[str],
+        title: Optional[str],
+    ) -> None:
+        """
+        Save the result of a successfully processed fetch.
+
+        Args:
+            consumer (str): Name of the consumer that processed the feed.
+            url (str): Feed URL.
+            etag (str | None): ETag header of the response.
+            last_modified (str | None): Last-Modified header of the response.
+            body_hash (str | None): Hash of the processed body.
+            title (str | None): Feed title.
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO feed_cache
+                    (consumer, url, etag, last_modified, body_hash, title, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(consumer, url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    body_hash = excluded.body_hash,
+                    title = COALESCE(excluded.title, feed_cache.title),
+                    updated_at = excluded.updated_at
+                """,
+                (consumer, url, etag, last_modified, body_hash, title, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def get_feed_cache(path: str = FEED_CACHE_FILE) -> FeedCache:
+    """
+    Return the process-wide feed cache for a database file.
+
+    Args:
+        path (str): Path of the SQLite database.
+
+    Returns:
+        FeedCache: Shared cache.
+    """
+    key = (os.getpid(), path)
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(key)
+            if cache is None:
+                cache = FeedCache(path)
+                _caches[key] = cache
+    return cache
@@ -5,111 +5,276 @@
 # environment.
 #
 # This script cointeins the methots to save de information in opensearch
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit
 from opensearchpy import OpenSearch, NotFoundError, TransportError
 from loguru import logger
+from app.utils.utils import get_connection_parameters, create_config_file
 
-def store_in_opensearch(data,host,port,nom_index) -> None:
+# Configuration file with the OpenSearch connection parameters
+CONFIG_FILE = 'cfg.ini'
+DEFAULT_PARAMETERS = ('localhost', 9200)
+
+# Settings of the shared OpenSearch clients
+CLIENT_MAXSIZE = 25          # Connections kept per host in the pool
+CLIENT_TIMEOUT = 30          # Seconds before a request times out
+CLIENT_MAX_RETRIES = 3       # Retries on connection errors and timeouts
+CLIENT_HTTP_COMPRESS = True  # Gzip request bodies
+
+# Shared clients keyed by (pid, host, port)
+_clients: dict = {}
+_clients_lock = threading.Lock()
+
+# Longest text (in characters) indexed in the text.keyword subfield; longer
+# values would exceed the 32766-byte limit of a keyword term (up to 4 bytes
+# per character) and make OpenSearch reject the whole document
+KEYWORD_IGNORE_ABOVE = 8191
+
+# Number of texts looked up per request by texts_existing_in_opensearch
+EXISTS_CHUNK_SIZE = 500
+
+# Default settings of the bulk writer
+BULK_FLUSH_SIZE = 500
+BULK_FLUSH_INTERVAL = 5.0
+BULK_MAX_BUFFER = 5000
+BULK_MAX_RETRIES = 3
+BULK_RETRY_BACKOFF = 1.0
+# Item statuses worth retrying (throttling and transient server errors)
+BULK_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def load_opensearch_parameters() -> tuple | None:
+    """
+    Read the OpenSearch connection parameters from the configuration file.
+
+    If the file is missing or invalid it is recreated with the default
+    parameters, which are then used.
+
+    Returns:
+        tuple | None: (host, port) to connect to, or None if the configuration
+        file could not be read nor recreated.
     """
-    Stores the processed data in OpenSearch.
+    file_content: list[str] = [
+        '# Configuration file.\n',
+        '# This file contains the parameters for connecting to the OpenSearch database server.\n',
+        '# ONLY one uncommented line is allowed.\n',
+        '# The valid line format is: server_ip;server_port\n',
+        f'{DEFAULT_PARAMETERS[0]};{DEFAULT_PARAMETERS[1]}\n'
+    ]
 
-    This function connects to a local OpenSearch instance and stores the
-    extracted and filtered content (such as text and keywords) in an index
-    called "documents". The OpenSearch instance is configured to use basic
-    authentication.
+    retorno_otros = get_connection_parameters(CONFIG_FILE)
+    logger.info(retorno_otros[1])
+
+    if retorno_otros[0] == 0:
+        return retorno_otros[2]
+
+    logger.info('Recreating configuration file...')
+    retorno_otros = create_config_file(CONFIG_FILE, file_content)
+    logger.info(retorno_otros[1])
+
+    if retorno_otros[0] != 0:
+        logger.error('Configuration file missing. Execution cannot continue without a configuration file.')
+        return None
+    return DEFAULT_PARAMETERS
+
+def _client_options(host: str, port: int) -> dict:
+    return {
+        "hosts": [{"host": host, "port": int(port)}],
+        "http_compress": CLIENT_HTTP_COMPRESS,
+        "use_ssl": False,
+        "verify_certs": False,
+        "maxsize": CLIENT_MAXSIZE,
+        "timeout": CLIENT_TIMEOUT,
+        "max_retries": CLIENT_MAX_RETRIES,
+        "retry_on_timeout": True,
+        # Keep connections open between requests
+        "headers": {"Connection": "keep-alive"},
+    }
+
+def get_opensearch_client(host: str, port: int) -> OpenSearch:
+    """
+    Return the process-wide OpenSearch client for a server.
+
+    Clients are created once per (host, port) and reused, so every caller
+    shares the same HTTP connection pool. The process id is part of the key
+    so that forked processes (e.g. spiders) never reuse their parent's sockets.
 
     Args:
-        data (dict): The data to store in OpenSearch. Typically includes the
-        URL, text, and keywords.
-        host (str): The host of the OpenSearch server (e.g., "localhost").
-        port (int): The port of the OpenSearch server (e.g., 9200).
-        nom_index(str): Name of the Index to store the data.
+        host (str): OpenSearch server IP or hostname.
+        port (int): OpenSearch server port.
+
+    Returns:
+        OpenSearch: Shared client.
     """
-    try:
+    key = (os.getpid(), host, int(port))
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                logger.info(f"Connecting to OpenSearch instance at {host}:{port}.")
+                client = OpenSearch(**_client_options(host, port))
+                _clients[key] = client
+    return client
 
-        logger.info(f"Connecting to OpenSearch instance at {host}:{port}.")
+def text_hash(text: str) -> str:
+    """
+    Compute the hash used to identify a text.
 
-        client = OpenSearch(
-            hosts=[{'host': host, 'port': port}]
-        )
+    The text is Unicode-normalized (NFC) and its whitespace collapsed first,
+    so texts that only differ in spacing share the same hash.
+
+    Parameters:
+        text (str): Text to hash.
 
-        response = client.index(index=nom_index, body=data)
+    Returns:
+        str: Hex SHA-256 digest of the normalized text.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
-        logger.info(
-            f"Document indexed successfully. Response: {response['result']}"
-        )
+def url_hash(url: str) -> str:
+    """
+    Compute the hash used to identify a URL.
+
+    The scheme and host are lowercased and the fragment is dropped before
+    hashing, so trivially different spellings of a URL share the same hash.
+
+    Parameters:
+        url (str): URL to hash.
+
+    Returns:
+        str: Hex SHA-256 digest of the normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    normalized = urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.query, "")
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+def document_id(data: dict) -> str | None:
+    """
+    Derive a stable document ID from the content of a document.
 
-    except Exception as e:
-        logger.error(f"Error while storing data in OpenSearch: {e}")
+    Scraped pages are identified by their URL and labeled texts by their
+    text, so storing the same page or text twice targets the same document.
 
-def text_exists_in_opensearch(text: str, host: str, port: int, index_name: str = "spacy_documents") -> bool:
+    Args:
+        data (dict): Document to store.
+
+    Returns:
+        str | None: Deterministic ID, or None if the document has neither a
+        'url' nor a 'text' field.
+    """
+    if data.get("url"):
+        return url_hash(data["url"])
+    if data.get("text"):
+        return text_hash(data["text"])
+    return None
+
+def _legacy_texts_existing(client, index_name: str, texts: list) -> set:
+    # Documents indexed before the deterministic IDs have random ones and are
+    # only found by their exact text; texts longer than the keyword limit are
+    # not in text.keyword and cannot be found this way
+    texts = [text for text in texts if len(text) <= KEYWORD_IGNORE_ABOVE]
+    if not texts:
+        return set()
+    resp = client.search(
+        index=index_name,
+        body={
+            "query": {"terms": {"text.keyword": texts}},
+            # One hit per distinct text, whatever the number of copies
+            "collapse": {"field": "text.keyword"},
+            "_source": ["text"],
+            "size": len(texts),
+        },
+    )
+    return {hit["_source"]["text"] for hit in resp.get("hits", {}).get("hits", [])}
+
+def texts_existing_in_opensearch(texts, host: str, port: int, index_name: str = "spacy_documents", chunk_size: int = EXISTS_CHUNK_SIZE) -> set:
     """
-    Check if a document with the same 'text' field already exists in OpenSearch.
+    Find which of the given texts are already stored in OpenSearch.
+
+    Labeled texts are stored under the hash of their text (see `document_id`),
+    so candidates are hashed and looked up by ID in chunks with `mget`, which
+    is a real-time get rather than a search. The texts whose ID is missing are
+    then searched by their exact text on `text.keyword`, which finds the
+    documents indexed with random IDs before the deterministic ones.
 
     Parameters:
-        text (str): Text to search for.
+        texts (Iterable[str]): Candidate texts.
         host (str): OpenSearch server IP or hostname.
         port (int): OpenSearch server port.
         index_name (str): Name of the index where documents are stored.
+        chunk_size (int): Number of texts sent per request.
 
     Returns:
-        bool: True if at least one document with the same text already exists, False otherwise.
+        set[str]: Subset of the texts that already exist in the index.
     """
-    client = OpenSearch(
-        hosts=[{"host": host, "port": port}],
-        http_compress=True,
-        use_ssl=False,
-        verify_certs=False,
-    )
+    candidates: dict[str, list[str]] = {}
+    for text in texts:
+        candidates.setdefault(text_hash(text), []).append(text)
+    existing = set()
+    if not candidates:
+        return existing
 
-    # Exact search on the 'text.keyword' field (requires keyword subfield in the mapping)
-    try:
-        query = {
-            "query": {
-                "term": {
-                    "text.keyword": text
-                }
-            },
-            "size": 1
-        }
+    client = get_opensearch_client(host, port)
+
+    ids = list(candidates)
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        try:
+            resp = client.mget(index=index_name, body={"ids": chunk}, _source=False)
+            missing = []
+            for doc in resp.get("docs", []):
+                if doc.get("found"):
+                    existing.update(candidates.get(doc.get("_id"), []))
+                else:
+                    missing.extend(candidates.get(doc.get("_id"), []))
+            existing.update(_legacy_texts_existing(client, index_name, missing))
+        except NotFoundError:
+            logger.info(f"Index '{index_name}' does not exist yet.")
+            return existing
+        except Exception as e:
+            logger.error(f"Error looking up texts in OpenSearch: {e}")
+            continue
 
-        resp = client.search(index=index_name, body=query)
-        hits_total = resp.get("hits", {}).get("total", {})
-        # OpenSearch may return an int or a dict with 'value'
-        if isinstance(hits_total, int):
-            return hits_total > 0
-        return hits_total.get("value", 0) > 0
-    except Exception as e:
-        logger.error(f"No existe el indice: {e}")
-        return False
+    return existing
 
 def ensure_index_exists(host: str, port: int, index_name: str = "spacy_documents") -> None:
     """
     Ensure that the given OpenSearch index exists. If it does not exist, create it.
 
+    The text.keyword subfield of an existing index gets `ignore_above` too
+    (an updatable mapping parameter), so indexes created before it stop
+    rejecting long texts.
+
     Parameters:
         host (str): OpenSearch server IP or hostname.
         port (int): OpenSearch server port.
         index_name (str): Name of the index to check/create.
     """
-    client = OpenSearch(
-        hosts=[{"host": host, "port": port}],
-        http_compress=True,
-        use_ssl=False,
-        verify_certs=False,
-    )
+    client = get_opensearch_client(host, port)
+
+    # Text with keyword subfield so term query on text.keyword works
+    text_mapping = {
+        "type": "text",
+        "fields": {
+            "keyword": {"type": "keyword", "ignore_above": KEYWORD_IGNORE_ABOVE}
+        }
+    }
 
     try:
         if not client.indices.exists(index=index_name):
-            # Minimal mapping: text with keyword subfield so term query on text.keyword works
+            # Minimal mapping
             body = {
                 "mappings": {
                     "properties": {
-                        "text": {
-                            "type": "text",
-                            "fields": {
-                                "keyword": {"type": "keyword"}
-                            }
-                        },
+                        "text": text_mapping,
                         "language": {"type": "keyword"},
                         "tags": {
                             "type": "keyword",
@@ -121,5 +286,194 @@ def ensure_index_exists(host: str, port: int, index_name: str = "spacy_documents
             }
             client.indices.create(index=index_name, body=body)
             logger.info(f"Index '{index_name}' created in OpenSearch.")
+        else:
+            client.indices.put_mapping(
+                index=index_name, body={"properties": {"text": text_mapping}}
+            )
     except TransportError as e:
-        logger.error(f"Error checking/creating index '{index_name}': {e}")
\ No newline at end of file
+        logger.error(f"Error checking/creating index '{index_name}': {e}")
+
+class OpenSearchBulkWriter:
+    """
+    Buffers documents and indexes them in OpenSearch with the `_bulk` API.
+
+    Documents are flushed when the buffer reaches `flush_size`, every
+    `flush_interval` seconds from a background thread, and on `close()`.
+    Producers block in `add()` while the buffer holds `max_buffer` documents,
+    so a slow cluster slows the producers down instead of growing memory.
+    Items rejected with a retryable status (see BULK_RETRY_STATUSES) are
+    retried with exponential backoff. Documents still not stored after the
+    retries, or lost with a failed request, are counted in `failed`: they
+    may be stored by a later attempt. Items rejected with any other status
+    (e.g. a 400 mapping error) would be rejected again, so they are logged
+    and counted apart in `rejected`.
+    Documents get deterministic IDs (see `document_id`); with op_type
+    "create", documents that already exist are counted as skipped.
+
+    Usage:
+        with OpenSearchBulkWriter(host, port, "spacy_documents") as writer:
+            for doc in docs:
+                writer.add(doc)
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        index_name: str,
+        op_type: str = "index",
+        flush_size: int = BULK_FLUSH_SIZE,
+        flush_interval: float = BULK_FLUSH_INTERVAL,
+        max_buffer: int = BULK_MAX_BUFFER,
+        max_retries: int = BULK_MAX_RETRIES,
+        retry_backoff: float = BULK_RETRY_BACKOFF,
+    ) -> None:
+        """
+        Args:
+            host (str): OpenSearch server IP or hostname.
+            port (int): OpenSearch server port.
+            index_name (str): Index where the documents are stored.
+            op_type (str): "index" to insert or replace documents, "create" to
+                only insert documents that do not exist yet.
+            flush_size (int): Number of buffered documents that triggers a flush.
+            flush_interval (float): Maximum seconds a document waits in the buffer.
+            max_buffer (int): Buffered documents at which `add()` blocks.
+            max_retries (int): Retries for items rejected with a retryable status.
+            retry_backoff (float): Initial delay between retries, doubled each time.
+        """
+        self.index_name = index_name
+        self.op_type = op_type
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max(max_buffer, flush_size)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.indexed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.rejected = 0
+
+        self._client = get_opensearch_client(host, port)
+        self._buffer: list = []
+        self._buffer_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def __enter__(self) -> "OpenSearchBulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def add(self, data: dict) -> None:
+        """
+        Queue a document for indexing.
+
+        Args:
+            data (dict): Document to index.
+        """
+        with self._buffer_cond:
+            while len(self._buffer) >= self.max_buffer:
+                self._buffer_cond.wait()
+            self._buffer.append(data)
+            should_flush = len(self._buffer) >= self.flush_size
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Send every buffered document to OpenSearch.
+        """
+        with self._flush_lock:
+            with self._buffer_cond:
+                batch, self._buffer = self._buffer, []
+                self._buffer_cond.notify_all()
+            if batch:
+                self._send(batch)
+
+    def close(self) -> None:
+        """
+        Stop the periodic flush and send the remaining documents.
+        """
+        self._closed.set()
+        self.flush()
+        logger.info(
+            f"Bulk writer for '{self.index_name}' closed: "
+            f"{self.indexed} indexed, {self.skipped} already stored, {self.failed} failed, "
+            f"{self.rejected} rejected."
+        )
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error during periodic bulk flush: {e}")
+
+    def _send(self, batch: list) -> None:
+        pending = batch
+        delay = self.retry_backoff
+
+        for attempt in range(self.max_retries + 1):
+            body = []
+            for doc in pending:
+                action = {"_index": self.index_name}
+                doc_id = document_id(doc)
+                if doc_id is not None:
+                    action["_id"] = doc_id
+                body.append(json.dumps({self.op_type: action}))
+                body.append(json.dumps(doc, ensure_ascii=False))
+
+            try:
+                response = self._client.bulk(body="\n".join(body) + "\n")
+            except TransportError as e:
+                # The whole request failed: retry it if the error is transient
+                status = e.status_code if isinstance(e.status_code, int) else 503
+                if status not in BULK_RETRY_STATUSES or attempt == self.max_retries:
+                    logger.error(f"Bulk request to '{self.index_name}' failed: {e}")
+                    self.failed += len(pending)
+                    return
+                retry = pending
+            except Exception as e:
+                logger.error(f"Bulk request to '{self.index_name}' failed: {e}")
+                self.failed += len(pending)
+                return
+            else:
+                retry = []
+                for doc, item in zip(pending, response.get("items", [])):
+                    result = next(iter(item.values()))
+                    status = result.get("status", 500)
+                    if status < 300:
+                        self.indexed += 1
+                    elif status == 409 and self.op_type == "create":
+                        self.skipped += 1
+                    elif status in BULK_RETRY_STATUSES:
+                        if attempt < self.max_retries:
+                            retry.append(doc)
+                        else:
+                            self.failed += 1
+                            logger.error(
+                                f"Document not stored in '{self.index_name}' after "
+                                f"{self.max_retries} retries (status {status}): {result.get('error')}"
+                            )
+                    else:
+                        # Permanent rejection: retrying the document cannot help
+                        self.rejected += 1
+                        logger.error(
+                            f"Document {result.get('_id')} rejected by '{self.index_name}' "
+                            f"(status {status}): {result.get('error')}"
+                        )
+
+            if not retry:
+                return
+
+            logger.warning(
+                f"Retrying {len(retry)} documents for '{self.index_name}' in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{self.max_retries})."
+            )
+            time.sleep(delay)
+            delay *= 2
+            pending = retry
@@ -5,12 +5,44 @@
 # Tiny RSS using PostgreSQL. Provides data models for input/output and database
 #functions to retrieve and insert feeds.
 
-from typing import List
+from typing import Dict, List
 from asyncpg import Connection
 from fastapi import HTTPException
 
 from app.models.pydantic import FeedCreateRequest, FeedResponse
 
+# TT-RSS user whose entries are crawled
+ADMIN_LOGIN = "admin"
+
+# User ids by login, looked up once per process
+_owner_uids: Dict[str, int] = {}
+
+
+async def get_owner_uid(conn: Connection, login: str = ADMIN_LOGIN) -> int:
+    """
+    Return the id of a TT-RSS user, querying ttrss_users only the first time.
+
+    Args:
+        conn (Connection): Active database connection.
+        login (str): Login of the user.
+
+    Returns:
+        int: Id of the user.
+
+    Raises:
+        ValueError: If the user does not exist.
+    """
+    owner_uid = _owner_uids.get(login)
+    if owner_uid is None:
+        row = await conn.fetchrow(
+            "SELECT id FROM ttrss_users WHERE login = $1",
+            login
+        )
+        if not row:
+            raise ValueError("User not found")
+        owner_uid = _owner_uids[login] = row["id"]
+    return owner_uid
+
 
 async def get_feeds_from_db(
     conn: Connection,
@@ -90,71 +122,34 @@ async def insert_feed_to_db(
         )
 
 
-async def get_entry_links(conn: Connection) -> List[str]:
-    """
-    Retrieve entry links that are unread (unread = true) for a specific user.
-
-    Args:
-        conn (Connection): Active database connection.
-
-    Returns:
-        List[str]: List of URLs not yet viewed by the user.
-    """
-    login = "admin"
-
-    row = await conn.fetchrow(
-        "SELECT id FROM ttrss_users WHERE login = $1",
-        login
-    )
-    if not row:
-        raise ValueError("User not found")
-    owner_uid = row["id"]
-    rows = await conn.fetch(
-        """
-        SELECT e.link
-        FROM ttrss_entries e
-        JOIN ttrss_user_entries u ON u.ref_id = e.id
-        WHERE e.link IS NOT NULL
-          AND u.owner_uid = $1
-          AND u.unread = TRUE
-        """,
-        owner_uid
-    )
-    return [row["link"] for row in rows]
-
-
-async def mark_entry_as_viewed(conn: Connection, url: str) -> None:
+async def mark_entries_as_viewed(conn: Connection, urls: List[str]) -> int:
     """
-    Mark an entry as viewed (unread = false) for the user with login "postgres".
+    Mark the entries of several links as viewed (unread = false) for the
+    admin user, with a single statement.
 
     Args:
         conn (Connection): Active database connection.
-        url (str): URL to mark as viewed.
+        urls (list[str]): Links of the entries to mark.
 
     Returns:
-        None
+        int: Number of user entries updated.
     """
-    login = "admin"
+    if not urls:
+        return 0
+    owner_uid = await get_owner_uid(conn)
 
-    row = await conn.fetchrow(
-        "SELECT id FROM ttrss_users WHERE login = $1",
-        login
-    )
-    if not row:
-        raise ValueError("User not found")
-    owner_uid = row["id"]
-
-    await conn.execute(
+    status = await conn.execute(
         """
         UPDATE ttrss_user_entries u
         SET unread = FALSE
         FROM ttrss_entries e
         WHERE u.ref_id = e.id
           AND u.owner_uid = $1
-          AND e.link = $2
+          AND u.unread = TRUE
+          AND e.link = ANY($2::text[])
         """,
         owner_uid,
-        url
+        list(urls)
     )
-
-
+    # Status string returned by asyncpg: "UPDATE <count>"
+    return int(status.split()[-1])
@@ -0,0 +1,300 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 17:52:14
+# @ Project: Cebolla
+# @ Description: Persistent index of the URLs already seen by the collectors
+# (SQLite).
+#
+# Every collector used to rebuild its own "already seen" set on each run by
+# reading whole output files. This index keeps them in one SQLite table with
+# a primary key on (namespace, hash of the canonical URL), so a lookup or an
+# insert is a single B-tree probe whatever the number of URLs. Namespaces
+# separate the kinds of URLs:
+#   - "articles": pages already scraped into the result store;
+#   - "sites":    websites listed in urls_cybersecurity_ot_it.txt.
+#
+# URLs are canonicalized first (lowercase scheme and host, no default port,
+# no fragment, no tracking parameters, sorted query), so trivially different
+# spellings of the same page are seen once.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from loguru import logger
+
+from app.utils.jsonl_store import OUTPUT_FILE, iter_records
+
+# Location of the index database
+URL_INDEX_FILE = "./data/url_index.sqlite3"
+
+ARTICLES = "articles"
+SITES = "sites"
+
+# List of websites that fills the "sites" namespace
+SITES_FILE = "./data/urls_cybersecurity_ot_it.txt"
+
+# Query parameters dropped by canonicalize_url
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid",
+    "mc_eid", "_ga", "_gl", "ref_src", "cmpid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+# URLs looked up per query by filter_new
+LOOKUP_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_urls (
+    namespace  TEXT NOT NULL,
+    url_hash   TEXT NOT NULL,
+    url        TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    PRIMARY KEY (namespace, url_hash)
+) WITHOUT ROWID
+"""
+
+# Shared indexes keyed by (pid, path)
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that equivalent spellings compare equal.
+
+    Args:
+        url (str): URL to normalize.
+
+    Returns:
+        str: Canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+class UrlIndex:
+    """
+    SQLite set of seen URLs per namespace.
+
+    The connection is shared by the threads of a process and serialized
+    with a lock; WAL mode lets several processes (e.g. spiders) use the
+    same file.
+    """
+
+    def __init__(self, path: str = URL_INDEX_FILE):
+        """
+        Args:
+            path (str): Path of the SQLite database.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def contains(self, url: str, namespace: str) -> bool:
+        """
+        Check whether a URL was already seen.
+
+        Args:
+            url (str): URL to look up.
+            namespace (str): Namespace of the URL.
+
+        Returns:
+            bool: True if the URL is in the index.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM seen_urls WHERE namespace = ? AND url_hash = ?",
+                (namespace, _url_key(url)),
+            ).fetchone()
+        return row is not None
+
+    def add(self, url: str, namespace: str) -> bool:
+        """
+        Add a URL to the index.
+
+        Args:
+            url (str): URL to add.
+            namespace (str): Namespace of the URL.
+
+        Returns:
+            bool: True if the URL was new, False if it was already seen.
+        """
+        return bool(self.add_many([url], namespace))
+
+    def add_many(self, urls: Iterable[str], namespace: str) -> List[str]:
+        """
+        Add several URLs to the index in one transaction.
+
+        Args:
+            urls (Iterable[str]): URLs to add.
+            namespace (str): Namespace of the URLs.
+
+        Returns:
+            list[str]: URLs that were new, in input order (duplicates
+            inside `urls` are only returned once).
+        """
+        new_urls = []
+        now = time.time()
+        with self._lock, self._conn:
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO seen_urls (namespace, url_hash, url, first_seen) "
+                    "VALUES (?, ?, ?, ?)",
+                    (namespace, _url_key(url), url, now),
+                )
+                if cursor.rowcount:
+                    new_urls.append(url)
+        return new_urls
+
+    def filter_new(self, urls: Iterable[str], namespace: str) -> List[str]:
+        """
+        Return the URLs not seen yet, without adding them.
+
+        Args:
+            urls (Iterable[str]): URLs to check.
+            namespace (str): Namespace of the URLs.
+
+        Returns:
+            list[str]: Unseen URLs in input order, one per canonical URL.
+        """
+        # Canonical key -> first URL with that key
+        pending = {}
+        for url in urls:
+            pending.setdefault(_url_key(url), url)
+
+        keys = list(pending)
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT url_hash FROM seen_urls "
+                    f"WHERE namespace = ? AND url_hash IN ({placeholders})",
+                    (namespace, *chunk),
+                ).fetchall()
+                for (key,) in rows:
+                    del pending[key]
+        return list(pending.values())
+
+    def is_empty(self, namespace: str) -> bool:
+        """
+        Check whether a namespace has no URL yet.
+
+        Args:
+            namespace (str): Namespace to check.
+
+        Returns:
+            bool: True if no URL was ever added to the namespace.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM seen_urls WHERE namespace = ? LIMIT 1", (namespace,)
+            ).fetchone()
+        return row is None
+
+    def bootstrap(self, namespace: str, urls: Iterable[str]) -> int:
+        """
+        Fill an empty namespace from the URLs collected before the index
+        existed. Does nothing if the namespace already has URLs.
+
+        Args:
+            namespace (str): Namespace to fill.
+            urls (Iterable[str]): Previously collected URLs (consumed only
+                if the namespace is empty).
+
+        Returns:
+            int: Number of URLs added.
+        """
+        if not self.is_empty(namespace):
+            return 0
+        return len(self.add_many(urls, namespace))
+
+    def close(self) -> None:
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+def get_url_index(path: str = URL_INDEX_FILE) -> UrlIndex:
+    """
+    Return the process-wide URL index for a database file.
+
+    Args:
+        path (str): Path of the SQLite database.
+
+    Returns:
+        UrlIndex: Shared index.
+    """
+    key = (os.getpid(), path)
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = UrlIndex(path)
+                _indexes[key] = index
+    return index
+
+
+def _stored_article_urls(path: str) -> Iterable[str]:
+    for record, _ in iter_records(path):
+        if isinstance(record, dict) and isinstance(record.get("url"), str):
+            yield record["url"]
+
+
+def _listed_site_urls(path: str) -> Iterable[str]:
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            url = line.strip()
+            if url:
+                yield url
+
+
+def bootstrap_url_index(
+    store_path: str = OUTPUT_FILE,
+    sites_path: str = SITES_FILE,
+) -> None:
+    """
+    Fill the empty namespaces of the index from the existing outputs: the
+    result store for "articles" and the websites file for "sites". Both
+    files are streamed, and only read the first time.
+
+    Args:
+        store_path (str): Path of the JSON Lines result store.
+        sites_path (str): Path of the websites file.
+    """
+    index = get_url_index()
+    articles = index.bootstrap(ARTICLES, _stored_article_urls(store_path))
+    sites = index.bootstrap(SITES, _listed_site_urls(sites_path))
+    if articles or sites:
+        logger.info(f"URL index initialized with {articles} articles and {sites} sites")
@@ -0,0 +1,142 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 20:02:45
+# @ Project: Cebolla
+# @ Description: Named Scrapy crawl profiles shared by the spiders.
+#
+# Instead of a fixed DOWNLOAD_DELAY of 2 seconds with the default
+# concurrency, the spiders take their throughput settings from a named
+# profile. Politeness is kept per domain (CONCURRENT_REQUESTS_PER_DOMAIN and
+# AutoThrottle), so a crawl over many domains can run many requests at once
+# while each site still sees a few at a time:
+#   - "polite":     one request at a time per domain, 2 s apart;
+#   - "balanced":   a couple of requests per domain (default);
+#   - "aggressive": high concurrency, short timeouts.
+#
+# The profile is chosen in the optional JSON file CRAWL_PROFILE_FILE, which
+# may also override single settings:
+#   {"profile": "aggressive", "overrides": {"CONCURRENT_REQUESTS": 128}}
+
+import json
+import os
+from typing import Dict, Tuple
+
+from loguru import logger
+
+# Optional configuration file with the profile to use
+CRAWL_PROFILE_FILE = "crawl_profile.json"
+DEFAULT_PROFILE = "balanced"
+
+PROFILES: Dict[str, Dict] = {
+    "polite": {
+        "DOWNLOAD_DELAY": 2.0,
+        "CONCURRENT_REQUESTS": 16,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 1,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 2.0,
+        "AUTOTHROTTLE_MAX_DELAY": 60.0,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 1.0,
+        "DNSCACHE_ENABLED": True,
+        "DNSCACHE_SIZE": 10000,
+        "DNS_TIMEOUT": 30,
+        "DOWNLOAD_TIMEOUT": 60,
+    },
+    "balanced": {
+        "DOWNLOAD_DELAY": 0.5,
+        "CONCURRENT_REQUESTS": 64,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 1.0,
+        "AUTOTHROTTLE_MAX_DELAY": 30.0,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 2.0,
+        "DNSCACHE_ENABLED": True,
+        "DNSCACHE_SIZE": 10000,
+        "DNS_TIMEOUT": 15,
+        "DOWNLOAD_TIMEOUT": 30,
+        "REACTOR_THREADPOOL_MAXSIZE": 20,
+    },
+    "aggressive": {
+        "DOWNLOAD_DELAY": 0.0,
+        "CONCURRENT_REQUESTS": 256,
+        "CONCURRENT_REQUESTS_PER_DOMAIN": 4,
+        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_START_DELAY": 0.5,
+        "AUTOTHROTTLE_MAX_DELAY": 10.0,
+        "AUTOTHROTTLE_TARGET_CONCURRENCY": 4.0,
+        "DNSCACHE_ENABLED": True,
+        "DNSCACHE_SIZE": 50000,
+        "DNS_TIMEOUT": 10,
+        "DOWNLOAD_TIMEOUT": 15,
+        "REACTOR_THREADPOOL_MAXSIZE": 40,
+    },
+}
+
+
+def load_crawl_profile(path: str = CRAWL_PROFILE_FILE) -> Tuple[str, Dict]:
+    """
+    Return the crawl profile configured in the profile file.
+
+    Falls back to DEFAULT_PROFILE if the file is missing, invalid or names
+    an unknown profile.
+
+    Args:
+        path (str): Path of the JSON configuration file.
+
+    Returns:
+        tuple: (profile name, Scrapy settings of the profile with the
+        overrides of the file applied).
+    """
+    config: Dict = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Invalid crawl profile file {path}, using '{DEFAULT_PROFILE}': {e}")
+    if not isinstance(config, dict):
+        logger.warning(f"Crawl profile file {path} is not a JSON object, using '{DEFAULT_PROFILE}'")
+        config = {}
+
+    name = config.get("profile", DEFAULT_PROFILE)
+    if not isinstance(name, str) or name not in PROFILES:
+        logger.warning(f"Unknown crawl profile '{name}', using '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE
+
+    settings = dict(PROFILES[name])
+    overrides = config.get("overrides") or {}
+    if isinstance(overrides, dict):
+        settings.update(overrides)
+    else:
+        logger.warning(f"Ignoring crawl profile overrides of {path}: not a JSON object")
+    return name, settings
+
+
+def report_crawl(crawler, profile: str) -> Dict:
+    """
+    Log the throughput of a finished crawl.
+
+    Args:
+        crawler (scrapy.crawler.Crawler): Crawler that ran the spider.
+        profile (str): Name of the crawl profile used.
+
+    Returns:
+        dict: Profile, pages received, elapsed seconds and pages per second.
+    """
+    stats = crawler.stats.get_stats() if crawler.stats else {}
+    pages = stats.get("response_received_count", 0)
+    elapsed = stats.get("elapsed_time_seconds")
+    if elapsed is None and stats.get("start_time") and stats.get("finish_time"):
+        elapsed = (stats["finish_time"] - stats["start_time"]).total_seconds()
+    elapsed = elapsed or 0.0
+
+    report = {
+        "profile": profile,
+        "pages": pages,
+        "elapsed_seconds": round(elapsed, 1),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0,
+    }
+    logger.info(
+        f"Crawl of {crawler.spider.name if crawler.spider else 'spider'} finished "
+        f"with profile '{profile}': {pages} pages in {report['elapsed_seconds']}s "
+        f"({report['pages_per_sec']} pages/s)"
+    )
+    return report
@@ -0,0 +1,352 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 20:31:17
+# @ Project: Cebolla
+# @ Description: Long-lived Scrapy runtime running crawls on demand.
+#
+# Starting a process, importing Scrapy/Twisted and running a fresh
+# CrawlerProcess for every batch costs seconds, which dominates small
+# batches. A CrawlerService is one process with one running reactor
+# (`CrawlerProcess.start(stop_after_crawl=False)`): batches of URLs are sent
+# to it over a multiprocessing queue and each one is scheduled as a new
+# crawl on the reactor that is already running.
+#
+# A job names a spider factory (a module-level function, so it can be
+# pickled) and its arguments. In the service process the factory is called
+# as factory(*args, done_queue=..., [output_queue=...]) and must return the
+# Spider class; what the spider puts on done_queue is sent back to the
+# parent as the items of the job, and the crawl report (see crawl_profiles)
+# when it finishes.
+
+import asyncio
+import itertools
+import logging
+import queue as queue_module
+import threading
+import time
+from multiprocessing import Process, Queue
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.scraping.crawl_profiles import load_crawl_profile, report_crawl
+
+# Settings shared by every crawl, completed by the crawl profile
+CRAWLER_SETTINGS = {
+    "LOG_ENABLED": False,
+    "USER_AGENT": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+    ),
+    "RETRY_ENABLED": True,
+    "RETRY_TIMES": 5,
+    "RETRY_HTTP_CODES": [429, 500, 502, 503, 504],
+}
+# Seconds between two reads of the service events while waiting for a job
+POLL_INTERVAL = 0.05
+
+# Kinds of events sent by the service process
+ITEM = "item"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class _JobChannel:
+    # done_queue given to the spiders of a job: tags what they put with the
+    # job id before it goes to the shared events queue
+    def __init__(self, events: Queue, job_id: int):
+        self.events = events
+        self.job_id = job_id
+
+    def put(self, value) -> None:
+        self.events.put((self.job_id, ITEM, value))
+
+
+def _serve(requests: Queue, events: Queue, output_queue) -> None:
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.log import configure_logging
+    from twisted.internet import reactor
+
+    configure_logging(install_root_handler=False)
+    logging.getLogger('scrapy').propagate = False
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    # The profile is read once: it also sizes the reactor (DNS cache,
+    # thread pool), so a new profile applies when the service restarts
+    profile, profile_settings = load_crawl_profile()
+    process = CrawlerProcess(settings={**CRAWLER_SETTINGS, **profile_settings})
+
+    def schedule(job_id: int, factory: Callable, args: tuple) -> None:
+        context = {"done_queue": _JobChannel(events, job_id)}
+        if output_queue is not None:
+            context["output_queue"] = output_queue
+        try:
+            crawler = process.create_crawler(factory(*args, **context))
+            deferred = process.crawl(crawler)
+        except Exception as e:
+            events.put((job_id, FAILED, str(e)))
+            return
+        deferred.addCallbacks(
+            lambda _: events.put((job_id, FINISHED, report_crawl(crawler, profile))),
+            lambda failure: events.put((job_id, FAILED, failure.getErrorMessage())),
+        )
+
+    def stop() -> None:
+        process.join().addBoth(lambda _: reactor.stop())
+
+    def listen() -> None:
+        while True:
+            message = requests.get()
+            if message is None:
+                break
+            reactor.callFromThread(schedule, *message)
+        reactor.callFromThread(stop)
+
+    threading.Thread(target=listen, daemon=True).start()
+    # Blocks until stop(); never stops on its own between crawls
+    process.start(stop_after_crawl=False, install_signal_handlers=False)
+
+
+class CrawlJob:
+    """
+    A crawl submitted to a CrawlerService.
+
+    Attributes:
+        id (int): Job id, unique within the service.
+        items (list): Everything the spiders put on their done_queue.
+        report (dict): Crawl report once finished (profile, pages/s...).
+        error (str): Reason of the failure, if the crawl failed.
+    """
+
+    def __init__(self, job_id: int):
+        self.id = job_id
+        self.items: List = []
+        self.report: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.submitted = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self._taken = 0
+
+    @property
+    def done(self) -> bool:
+        """
+        bool: True once the crawl finished or failed.
+        """
+        return self.finished_at is not None
+
+    def take_items(self) -> List:
+        """
+        Return the items received since the previous call.
+
+        Returns:
+            list: New items, in arrival order.
+        """
+        new_items = self.items[self._taken:]
+        self._taken = len(self.items)
+        return new_items
+
+    def _finish(self, report: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        self.report = report
+        self.error = error
+        self.finished_at = time.monotonic()
+
+
+class CrawlerService:
+    """
+    Persistent crawler process with one running reactor.
+
+    Usage:
+        service = CrawlerService()
+        job = service.submit(create_rss_spider, urls)
+        await service.wait(job)
+        feeds = job.items
+        service.stop()
+    """
+
+    def __init__(self, output_queue=None, name: str = "crawler"):
+        """
+        Args:
+            output_queue (multiprocessing.Queue, optional): Queue of the
+                output writer process, passed to the spider factories as
+                `output_queue`.
+            name (str): Name of the service in the logs.
+        """
+        self.output_queue = output_queue
+        self.name = name
+        self.crawls = 0
+        self._requests: Optional[Queue] = None
+        self._events: Optional[Queue] = None
+        self._process: Optional[Process] = None
+        self._jobs: Dict[int, CrawlJob] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._stopping = False
+
+    @property
+    def pid(self) -> Optional[int]:
+        """
+        int: Process id of the service, None if it is not running.
+        """
+        return self._process.pid if self.is_alive() else None
+
+    @property
+    def exitcode(self) -> Optional[int]:
+        """
+        int: Exit code of the last service process, None while it runs.
+        """
+        return self._process.exitcode if self._process is not None else None
+
+    def is_alive(self) -> bool:
+        """
+        Returns:
+            bool: True if the service process is running.
+        """
+        return self._process is not None and self._process.is_alive()
+
+    def start(self) -> None:
+        """
+        Start the service process, if it is not running. A new process gets
+        new queues, so nothing sent to a dead one is replayed.
+        """
+        with self._lock:
+            if self.is_alive():
+                return
+            if self._process is not None:
+                # Fail the jobs of the dead process before its queues go
+                self.poll()
+            self._requests = Queue()
+            self._events = Queue()
+            self._stopping = False
+            self._process = Process(
+                target=_serve,
+                args=(self._requests, self._events, self.output_queue),
+                daemon=True,
+            )
+            self._process.start()
+        logger.info(f"Crawler service '{self.name}' started (pid {self._process.pid})")
+
+    def submit(self, factory: Callable, *args) -> CrawlJob:
+        """
+        Schedule a new crawl on the service, starting it if needed.
+
+        Args:
+            factory (Callable): Module-level function returning the Spider
+                class, called as factory(*args, done_queue=..., ...).
+            *args: Picklable arguments of the factory (e.g. the URLs).
+
+        Returns:
+            CrawlJob: The submitted job.
+        """
+        with self._lock:
+            self.start()
+            job = CrawlJob(next(self._ids))
+            self._jobs[job.id] = job
+            self.crawls += 1
+            self._requests.put((job.id, factory, args))
+        return job
+
+    def poll(self) -> None:
+        """
+        Read the pending events of the service into their jobs. If the
+        process died, its unfinished jobs are failed.
+        """
+        with self._lock:
+            if self._events is None:
+                return
+            # Checked before draining, so nothing is left behind
+            alive = self._process.is_alive()
+            while True:
+                try:
+                    job_id, kind, value = self._events.get_nowait()
+                except queue_module.Empty:
+                    break
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == ITEM:
+                    job.items.append(value)
+                else:
+                    del self._jobs[job_id]
+                    if kind == FINISHED:
+                        job._finish(report=value)
+                    else:
+                        job._finish(error=value)
+
+            if not alive and self._jobs:
+                self._process.join()
+                error = f"Crawler service exited (exit code {self._process.exitcode})"
+                for job in self._jobs.values():
+                    job._finish(error=error)
+                self._jobs.clear()
+
+    async def wait(self, job: CrawlJob, interval: float = POLL_INTERVAL) -> CrawlJob:
+        """
+        Wait for a job to finish without blocking the event loop.
+
+        Args:
+            job (CrawlJob): Job returned by submit.
+            interval (float): Seconds between two polls of the service.
+
+        Returns:
+            CrawlJob: The same job, finished or failed.
+        """
+        while True:
+            self.poll()
+            if job.done:
+                return job
+            await asyncio.sleep(interval)
+
+    def request_stop(self) -> None:
+        """
+        Ask the service process to stop once its running crawls finish,
+        without waiting for it (see stop).
+        """
+        with self._lock:
+            if self.is_alive() and not self._stopping:
+                self._requests.put(None)
+                self._stopping = True
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        Let the running crawls finish and stop the service process.
+
+        Args:
+            timeout (float): Seconds to wait before terminating it.
+        """
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self.request_stop()
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+        logger.info(f"Crawler service '{self.name}' stopped after {self.crawls} crawls")
+        self.poll()
+
+
+# Service shared by the occasional crawls of the application process
+_service: Optional[CrawlerService] = None
+
+
+def get_crawler_service() -> CrawlerService:
+    """
+    Return the shared crawler service, started on first use.
+
+    Returns:
+        CrawlerService: Shared service (without output writer queue).
+    """
+    global _service
+    if _service is None:
+        _service = CrawlerService(name="shared")
+    _service.start()
+    return _service
+
+
+def stop_crawler_service() -> None:
+    """
+    Stop the shared crawler service, if it was started.
+    """
+    global _service
+    if _service is not None:
+        _service.stop()
+        _service = None
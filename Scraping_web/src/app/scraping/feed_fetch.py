@@ -0,0 +1,115 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 17:18:02
+# @ Project: Cebolla
+# @ Description: Conditional feed downloads shared by the feed pollers.
+#
+# `fetch_feed` sends the cached ETag / Last-Modified of a feed and tells the
+# caller whether it has to be parsed at all:
+#   - "not_modified": the server answered 304, there is no body;
+#   - "unchanged":    the body has the same hash as the last processed one;
+#   - "changed":      new content, to be parsed.
+# Once a changed feed has been processed, the caller records it with
+# `commit_feed`, so a feed that failed to be processed is fetched again in
+# full next time.
+#
+# Every caller names itself as the consumer of the feed: the cache is kept
+# per consumer, so a feed processed by one of them is still "changed" for
+# the others.
+
+import hashlib
+from typing import NamedTuple, Optional
+
+from app.models.feed_cache import FeedCache, get_feed_cache
+from app.scraping.http_client import get_http_client
+
+NOT_MODIFIED = "not_modified"
+UNCHANGED = "unchanged"
+CHANGED = "changed"
+
+
+class FeedFetch(NamedTuple):
+    consumer: str
+    url: str
+    status: str
+    body: Optional[bytes]
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: Optional[str]
+    # Title recorded the last time the feed was processed
+    cached_title: Optional[str]
+
+    @property
+    def changed(self) -> bool:
+        return self.status == CHANGED
+
+
+async def fetch_feed(
+    url: str,
+    consumer: str,
+    cache: Optional[FeedCache] = None,
+) -> FeedFetch:
+    """
+    Download a feed with a conditional GET.
+
+    Args:
+        url (str): Feed URL.
+        consumer (str): Name of the caller; the validators and body hash
+            sent and compared are the ones it last processed.
+        cache (FeedCache, optional): Feed cache. Defaults to the shared one.
+
+    Returns:
+        FeedFetch: Outcome of the download; `body` is only set when the feed
+        changed.
+
+    Raises:
+        httpx.HTTPError: If the request fails or the server returns an error.
+    """
+    cache = cache or get_feed_cache()
+    cached = cache.get(consumer, url)
+
+    response = await get_http_client().get(
+        url, headers=cache.conditional_headers(consumer, url)
+    )
+    cached_title = cached.title if cached else None
+
+    if response.status_code == 304 and cached:
+        return FeedFetch(
+            consumer, url, NOT_MODIFIED, None, "", cached.etag, cached.last_modified,
+            cached.body_hash, cached_title,
+        )
+    response.raise_for_status()
+
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    body_hash = hashlib.sha256(response.content).hexdigest()
+
+    if cached and cached.body_hash == body_hash:
+        # Same content: refresh the validators, skip the parsing
+        cache.store(consumer, url, etag, last_modified, body_hash, None)
+        return FeedFetch(
+            consumer, url, UNCHANGED, None, "", etag, last_modified, body_hash, cached_title
+        )
+
+    return FeedFetch(
+        consumer, url, CHANGED, response.content, response.headers.get("content-type", ""),
+        etag, last_modified, body_hash, cached_title,
+    )
+
+
+def commit_feed(
+    fetch: FeedFetch,
+    title: Optional[str] = None,
+    cache: Optional[FeedCache] = None,
+) -> None:
+    """
+    Record a changed feed as processed by the consumer that fetched it.
+
+    Args:
+        fetch (FeedFetch): Result of `fetch_feed`.
+        title (str, optional): Feed title.
+        cache (FeedCache, optional): Feed cache. Defaults to the shared one.
+    """
+    (cache or get_feed_cache()).store(
+        fetch.consumer, fetch.url, fetch.etag, fetch.last_modified, fetch.body_hash, title
+    )
@@ -1,9 +1,10 @@
 import asyncio
-import random
 from pathlib import Path
 from googlesearch import search
 from loguru import logger
 from concurrent.futures import ThreadPoolExecutor
+from app.scraping.politeness import scheduler
+from app.models.url_index import SITES, get_url_index
 
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
@@ -24,9 +25,6 @@ DORKS = [
     '"information security" "Atom feed"',
 ]
 
-MAX_SEARCHES_PER_MINUTE = 6
-MIN_SECONDS_BETWEEN_SEARCHES = 60 / MAX_SEARCHES_PER_MINUTE
-
 executor = ThreadPoolExecutor()
 
 OUTPUT_FILE = Path("./data/urls_cybersecurity_ot_it.txt")
@@ -38,15 +36,22 @@ async def search_async(query: str, num_results: int = 15) -> list[str]:
 
     Executes a search query using Google's search engine via the `googlesearch` module.
     The function runs within a thread executor to remain non-blocking in async context.
+    Searches share the rate limit of the "google" backend with the news search,
+    and a throttled answer (429 with Retry-After) pauses that backend.
 
     @param query Search query to be executed.
     @param num_results Number of results to retrieve.
     @return List of result URLs.
     '''
+    await scheduler.wait_backend("google")
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        executor, lambda: list(search(query, num_results=num_results))
-    )
+    try:
+        return await loop.run_in_executor(
+            executor, lambda: list(search(query, num_results=num_results))
+        )
+    except Exception as e:
+        scheduler.observe_backend("google", getattr(e, "response", None))
+        raise
 
 
 async def run_dork_search_feed():
@@ -54,17 +59,15 @@ async def run_dork_search_feed():
     @brief Perform Google Dork queries and write results incrementally to a file.
 
     Executes a list of predefined search queries related to cybersecurity topics.
-    Each valid, non-duplicate result is written immediately to a local file.
-    Includes randomized delays to reduce risk of throttling by Google.
+    Each valid result not yet in the persistent URL index ("sites" namespace)
+    is written immediately to a local file.
+    Searches are paced by the per-backend rate limiter to avoid throttling by Google.
 
     @note Helps in continuously collecting potentially relevant URLs.
     '''
     logger.info("Starting search for cybersecurity-related URLs...")
 
-    existing_urls = set()
-    if OUTPUT_FILE.exists():
-        with OUTPUT_FILE.open("r", encoding="utf-8") as f:
-            existing_urls = {line.strip() for line in f if line.strip()}
+    url_index = get_url_index()
 
     for dork in DORKS:
         logger.info(f"🔎 Searching with dork: {dork}")
@@ -73,24 +76,15 @@ async def run_dork_search_feed():
             for url in results:
                 if not url.startswith("http"):
                     continue
-                if url in existing_urls:
+                # Adds the URL to the persistent index, False if already seen
+                if not url_index.add(url, SITES):
                     continue
 
                 logger.success(f"Found URL: {url}")
                 with OUTPUT_FILE.open("a", encoding="utf-8") as f:
                     f.write(url + "\n")
 
-                existing_urls.add(url)
-
-                await asyncio.sleep(random.uniform(1, 2))
-
         except Exception as e:
             logger.error(f"Error while searching with dork '{dork}': {e}")
 
-        sleep_time = random.uniform(
-            MIN_SECONDS_BETWEEN_SEARCHES * 0.8, MIN_SECONDS_BETWEEN_SEARCHES * 1.5
-        )
-        logger.info(f"Waiting {sleep_time:.2f} seconds before next search...")
-        await asyncio.sleep(sleep_time)
-
     logger.info("Finished all dork searches.")
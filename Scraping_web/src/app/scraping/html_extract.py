@@ -0,0 +1,167 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 14:31:50
+# @ Project: Cebolla
+# @ Description: Single-pass extraction of the page structure used by the
+# collectors (title, h1-h6 and p texts).
+#
+# The parsed lxml tree is walked once, in document order, visiting only
+# the elements of interest. The text of each element includes its nested
+# inline elements (links, bold...) and is whitespace-normalized; empty
+# elements are skipped. Text that is not displayed is left out, as
+# BeautifulSoup's get_text() does: the content of script, style and
+# template elements and HTML comments (also inside <title>, which lxml
+# keeps as raw text). The same routine is used by the Scrapy dynamic
+# spider (on the tree parsel already built) and by the Google dork news
+# search.
+#
+# For raw HTML, `extract_page` dispatches to a pluggable parser backend:
+#   - "lxml":   lxml.html parser (fast path, default)
+#   - "parsel": the lxml tree built by parsel, as Scrapy does
+#   - "bs4":    BeautifulSoup with html.parser (previous news_gd behaviour,
+#               slowest, kept for comparison and as a fallback)
+# Every backend returns the same dictionary for well-formed pages
+# (tests/test_html_extract.py); benchmarks/bench_parser_backends.py
+# compares their speed.
+
+import re
+from typing import Callable, Dict, List, Optional
+
+import lxml.html
+from lxml import etree
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+TEXT_TAGS = HEADING_TAGS + ("p",)
+# Elements whose content is never displayed text
+SKIPPED_TAGS = ("script", "style", "template")
+
+# Text nodes of an element and its descendants, outside the skipped
+# elements (comments are not text nodes)
+_VISIBLE_TEXT = etree.XPath(
+    "descendant-or-self::text()[not(%s)]"
+    % " or ".join(f"ancestor::{tag}" for tag in SKIPPED_TAGS)
+)
+# Comments left in raw text elements such as <title>
+_RAW_COMMENT = re.compile(r"<!--.*?(?:-->|$)", re.S)
+
+
+def element_text(element) -> str:
+    '''
+    @brief Returns the whitespace-normalized visible text of an element and
+    its children.
+
+    @param element: lxml element.
+    @return: Text of the element, without script/style/template content and
+    comments.
+    '''
+    text = "".join(_VISIBLE_TEXT(element))
+    if element.tag == "title":
+        text = _RAW_COMMENT.sub("", text)
+    return " ".join(text.split())
+
+
+def parse_html(html: str):
+    '''
+    @brief Parses an HTML document into an lxml tree.
+
+    @param html: HTML source.
+    @return: Root element of the document.
+    '''
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # Unicode strings with an XML encoding declaration are rejected by lxml
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+def extract_structure(root, url: str, default_title: Optional[str] = "") -> Dict:
+    '''
+    @brief Collects the title and the h1-h6/p texts of a page in one traversal.
+
+    @param root: Root lxml element of the page.
+    @param url: URL of the page, copied to the result.
+    @param default_title: Title used when the page has none.
+    @return: Dictionary with url, title, h1..h6 and p (lists of texts in
+    document order).
+    '''
+    page: Dict = {"url": url, "title": None}
+    texts: Dict[str, List[str]] = {tag: [] for tag in TEXT_TAGS}
+
+    for element in root.iter("title", *TEXT_TAGS):
+        text = element_text(element)
+        if element.tag == "title":
+            if page["title"] is None:
+                page["title"] = text
+        elif text:
+            texts[element.tag].append(text)
+
+    if not page["title"]:
+        page["title"] = default_title
+    page.update(texts)
+    return page
+
+
+def _extract_lxml(html: str, url: str, default_title: Optional[str]) -> Dict:
+    return extract_structure(parse_html(html), url, default_title)
+
+
+def _extract_parsel(html: str, url: str, default_title: Optional[str]) -> Dict:
+    from parsel import Selector
+
+    return extract_structure(Selector(text=html).root, url, default_title)
+
+
+def _extract_bs4(html: str, url: str, default_title: Optional[str]) -> Dict:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    page: Dict = {"url": url, "title": None}
+    texts: Dict[str, List[str]] = {tag: [] for tag in TEXT_TAGS}
+
+    # find_all with a list of names is also a single traversal in document order
+    for element in soup.find_all(["title", *TEXT_TAGS]):
+        text = " ".join(element.get_text().split())
+        if element.name == "title":
+            if page["title"] is None:
+                page["title"] = text
+        elif text:
+            texts[element.name].append(text)
+
+    if not page["title"]:
+        page["title"] = default_title
+    page.update(texts)
+    return page
+
+
+# Available parser backends for extract_page()
+PARSER_BACKENDS: Dict[str, Callable[[str, str, Optional[str]], Dict]] = {
+    "lxml": _extract_lxml,
+    "parsel": _extract_parsel,
+    "bs4": _extract_bs4,
+}
+DEFAULT_PARSER_BACKEND = "lxml"
+
+
+def extract_page(
+    html: str,
+    url: str,
+    default_title: Optional[str] = "",
+    backend: str = DEFAULT_PARSER_BACKEND,
+) -> Dict:
+    '''
+    @brief Parses raw HTML with the chosen backend and extracts its structure.
+
+    @param html: HTML source.
+    @param url: URL of the page, copied to the result.
+    @param default_title: Title used when the page has none.
+    @param backend: Name of a backend in PARSER_BACKENDS.
+    @return: Dictionary with url, title, h1..h6 and p (lists of texts in
+    document order).
+    @throws ValueError: If the backend is unknown.
+    '''
+    try:
+        extractor = PARSER_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown parser backend '{backend}'. Available: {', '.join(PARSER_BACKENDS)}"
+        ) from None
+    return extractor(html, url, default_title)
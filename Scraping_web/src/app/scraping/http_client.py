@@ -0,0 +1,87 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 15:48:09
+# @ Project: Cebolla
+# @ Description: Shared pooled HTTP client of the asynchronous collectors.
+#
+# Opening an `httpx.AsyncClient` per request means a new TCP connection and
+# TLS handshake every time. Instead, one long-lived client is kept per event
+# loop: the FastAPI lifespan creates the client of the main loop on startup
+# and closes it on shutdown, so its connection pool (and HTTP/2 sessions,
+# when the optional `h2` package is installed) is reused by every fetch.
+# Code running its own loop (e.g. `asyncio.run` in a worker thread) gets a
+# separate client and must close it with `close_http_client()` before the
+# loop ends.
+
+import asyncio
+import importlib.util
+import weakref
+
+import httpx
+from loguru import logger
+
+# Default headers sent by the shared client
+DEFAULT_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/123.0.0.0 Safari/537.36'
+    )
+}
+
+# Settings of the shared client
+HTTP_MAX_CONNECTIONS = 100     # Open connections across every host
+HTTP_MAX_KEEPALIVE = 20        # Idle connections kept in the pool
+HTTP_KEEPALIVE_EXPIRY = 30.0   # Seconds an idle connection is kept
+HTTP_TIMEOUT = 10.0            # Seconds before a request times out
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Shared client per event loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    '''
+    @brief Creates an AsyncClient with the pool settings of this module.
+
+    @return: New client; the caller is responsible for closing it.
+    '''
+    return httpx.AsyncClient(
+        headers=DEFAULT_HEADERS,
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    '''
+    @brief Returns the shared client of the running event loop.
+
+    The client is created on first use.
+
+    @return: Shared AsyncClient.
+    '''
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = create_http_client()
+        _clients[loop] = client
+        logger.info(f"Shared HTTP client created (http2={HTTP2_ENABLED})")
+    return client
+
+
+async def close_http_client() -> None:
+    '''
+    @brief Closes the shared client of the running event loop, if any.
+    '''
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
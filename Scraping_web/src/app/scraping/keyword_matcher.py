@@ -0,0 +1,121 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 13:02:41
+# @ Project: Cebolla
+# @ Description: Compiled multi-keyword matcher shared by the collectors.
+#
+# Instead of scanning the page once per keyword, all the keywords are
+# compiled into a single regular expression built from a character trie
+# (keywords sharing a prefix share a branch), and the text is lowercased
+# once and scanned once. Matches start at a word boundary. Short keywords
+# ("apt", "xss", "ICS"...) must also end at a word boundary, so they no
+# longer match inside longer words ("adapt", "physics"); longer keywords
+# keep matching as word prefixes ("exploit" matches "exploited").
+# Whitespace inside multi-word keywords matches any run of whitespace.
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable
+
+# Keywords shorter than this must match as whole words
+PREFIX_MIN_LENGTH = 5
+
+# Marks the end of a keyword inside the trie
+_END = ""
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def _trie_pattern(node: Dict) -> str:
+    alternatives = []
+    for char in sorted(key for key in node if key != _END):
+        token = r"\s+" if char == " " else re.escape(char)
+        alternatives.append(token + _trie_pattern(node[char]))
+    if _END in node:
+        # Last alternative, so longer keywords sharing this prefix win
+        alternatives.append(r"\b" if node[_END] else "")
+
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of a set of keywords in a text with one scan.
+
+    Usage:
+        matcher = KeywordMatcher(["malware", "apt"])
+        matcher.counts("Malware used by an APT group")  # {'malware': 1, 'apt': 1}
+    """
+
+    def __init__(self, keywords: Iterable[str], prefix_min_length: int = PREFIX_MIN_LENGTH):
+        """
+        Args:
+            keywords (Iterable[str]): Keywords to look for (case-insensitive).
+            prefix_min_length (int): Keywords shorter than this must match as
+                whole words; longer ones may be followed by more letters.
+        """
+        self.keywords = list(keywords)
+        # Normalized form -> keyword as given by the caller
+        self._canonical: Dict[str, str] = {}
+        trie: Dict = {}
+
+        for keyword in self.keywords:
+            normalized = _normalize(keyword)
+            if not normalized:
+                continue
+            self._canonical.setdefault(normalized, keyword)
+            node = trie
+            for char in normalized:
+                node = node.setdefault(char, {})
+            node[_END] = len(normalized) < prefix_min_length
+
+        self._pattern = re.compile(r"\b" + _trie_pattern(trie)) if trie else None
+
+    def counts(self, text: str) -> Counter:
+        """
+        Count how many times each keyword appears in a text.
+
+        Args:
+            text (str): Text to scan.
+
+        Returns:
+            Counter: Occurrences per keyword (only keywords found are present).
+        """
+        found: Counter = Counter()
+        if self._pattern is None or not text:
+            return found
+        for match in self._pattern.finditer(text.lower()):
+            found[self._canonical[_normalize(match.group())]] += 1
+        return found
+
+    def matches(self, text: str) -> bool:
+        """
+        Check whether a text contains at least one keyword.
+
+        Args:
+            text (str): Text to scan.
+
+        Returns:
+            bool: True if any keyword is found.
+        """
+        if self._pattern is None or not text:
+            return False
+        return self._pattern.search(text.lower()) is not None
+
+
+@lru_cache(maxsize=32)
+def get_matcher(keywords: tuple) -> KeywordMatcher:
+    """
+    Return a compiled matcher for a tuple of keywords, reusing it across calls.
+
+    Args:
+        keywords (tuple): Keywords to look for.
+
+    Returns:
+        KeywordMatcher: Compiled matcher.
+    """
+    return KeywordMatcher(keywords)
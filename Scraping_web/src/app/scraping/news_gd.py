@@ -1,20 +1,15 @@
 import asyncio
-import json
-import random
-from pathlib import Path
+import time
 from typing import List, Dict, Optional
-import httpx
-from bs4 import BeautifulSoup
 from googlesearch import search
 from loguru import logger
-
-HEADERS = {
-    'User-Agent': (
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-        'AppleWebKit/537.36 (KHTML, like Gecko) '
-        'Chrome/123.0.0.0 Safari/537.36'
-    )
-}
+from app.utils.jsonl_store import OUTPUT_FILE, append_record
+from app.models.url_index import ARTICLES, canonicalize_url, get_url_index
+from app.scraping.keyword_matcher import get_matcher
+from app.scraping.relevance import RelevanceScorer
+from app.scraping.html_extract import extract_page
+from app.scraping.http_client import get_http_client
+from app.scraping.politeness import scheduler
 
 DORKS = [
     '"SCADA vulnerability"',
@@ -32,7 +27,15 @@ KEYWORDS = [
     'IT security', 'malware', 'vulnerabilidad', 'ciberseguridad'
 ]
 
-OUTPUT_FILE = Path("./outputs/result.json")
+# Weighted scoring of the articles (see app.scraping.relevance)
+NEWS_SCORER = RelevanceScorer(KEYWORDS)
+
+# HTML parser used for the articles (see app.scraping.html_extract)
+PARSER_BACKEND = "lxml"
+
+# Articles downloaded at the same time (each domain keeps its own rate
+# limit, see app.scraping.politeness)
+FETCH_CONCURRENCY = 8
 
 
 def is_relevant(text: str, keywords: List[str] = KEYWORDS) -> bool:
@@ -40,112 +43,116 @@ def is_relevant(text: str, keywords: List[str] = KEYWORDS) -> bool:
     @brief Check if the article contains any relevant keyword.
 
     Evaluates whether the given text includes at least one of the defined
-    keywords (case-insensitive).
+    keywords (case-insensitive), scanning the text once with a compiled
+    matcher shared across calls.
 
     @param text: Full text content of the article.
     @param keywords: List of keywords to check against.
     @return: True if any keyword is found, False otherwise.
     '''
-    return any(k.lower() in text.lower() for k in keywords)
+    return get_matcher(tuple(keywords)).matches(text)
 
 
 async def extract_news_structure(url: str) -> Optional[Dict]:
     '''
     @brief Extract structured content from a news article URL.
 
-    Fetches and parses the HTML of the given URL to extract article content
-    and metadata. Only returns the result if it's considered relevant.
+    Fetches the HTML of the given URL with the shared HTTP client, so
+    connections are reused across articles, and parses it to extract
+    article content and metadata. Relevance is scored later, for all the
+    articles of a run at once (see store_relevant_news).
 
     @param url: URL of the article.
-    @return: Dictionary containing article metadata or None if irrelevant or
-    error occurs.
+    @return: Dictionary containing article metadata or None if an error
+    occurs.
     '''
     try:
-        async with httpx.AsyncClient(
-            headers=HEADERS, timeout=10, follow_redirects=True
-        ) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            def extract_all(tag: str) -> List[str]:
-                return [e.get_text(strip=True) for e in soup.find_all(tag)]
-
-            news = {
-                "url": url,
-                "title": soup.title.string.strip() if soup.title else "",
-                "h1": extract_all("h1"),
-                "h2": extract_all("h2"),
-                "h3": extract_all("h3"),
-                "h4": extract_all("h4"),
-                "h5": extract_all("h5"),
-                "h6": extract_all("h6"),
-                "p": extract_all("p"),
-            }
-
-            full_text = " ".join(news["p"])
-            return news if is_relevant(full_text) else None
+        response = await get_http_client().get(url)
+        scheduler.observe(url, response)
+        response.raise_for_status()
+        return extract_page(response.text, url, backend=PARSER_BACKEND)
 
     except Exception as e:
         logger.warning(f"Error processing {url}: {e}")
         return None
 
 
-async def async_search(query: str, num_results: int = 5) -> List[str]:
+async def fetch_news_item(url: str, semaphore: asyncio.Semaphore) -> Optional[Dict]:
     '''
-    @brief Perform Google search asynchronously.
+    @brief Download and parse one article.
 
-    Executes a Google search for the given query in a non-blocking way.
+    The domain slot is reserved once the task holds the semaphore, right
+    before the request, so articles queued on the semaphore do not keep
+    slots that expire while they wait.
 
-    @param query: Search string.
-    @param num_results: Number of URLs to retrieve.
-    @return: List of result URLs.
+    @param url: URL of the article.
+    @param semaphore: Bounds the number of articles downloaded at once.
+    @return: Extracted article, or None if it was skipped or failed.
     '''
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        None, lambda: list(search(query, num_results=num_results))
-    )
+    async with semaphore:
+        if not await scheduler.wait(url):
+            return None
+        return await extract_news_structure(url)
 
 
-def load_existing_urls() -> set:
+def store_relevant_news(articles: List[Dict]) -> int:
     '''
-    @brief Load existing URLs from the result file.
+    @brief Score a batch of articles at once and store the relevant ones.
 
-    Reads existing URLs from the JSON file to avoid duplication.
+    The whole batch goes through one vectorized scoring call of
+    NEWS_SCORER instead of one call per article.
 
-    @return: Set of existing URLs.
+    @param articles: Extracted articles.
+    @return: Number of articles stored.
     '''
-    if OUTPUT_FILE.exists():
-        try:
-            with OUTPUT_FILE.open("r", encoding="utf-8") as f:
-                existing_news = json.load(f)
-                return {item["url"] for item in existing_news}
-        except json.JSONDecodeError:
-            logger.warning("JSON file is corrupted. Starting with an empty set.")
-            return set()
-    return set()
+    stored = 0
+    for news_item, (score, relevant, keywords) in zip(
+        articles, NEWS_SCORER.evaluate_pages(articles)
+    ):
+        if not relevant:
+            continue
+        news_item["keywords"] = keywords
+        news_item["relevance_score"] = round(score, 3)
+        append_news_item(news_item)
+        get_url_index().add(news_item["url"], ARTICLES)
+        logger.success(f"Added news from {news_item['url']}")
+        stored += 1
+    return stored
 
 
-def append_news_item(news_item: Dict):
+async def async_search(query: str, num_results: int = 5) -> List[str]:
     '''
-    @brief Append a single news item to the result file.
+    @brief Perform Google search asynchronously.
 
-    Loads existing items, appends a new one, and writes back to disk.
+    Executes a Google search for the given query in a non-blocking way,
+    within the rate limit of the "google" backend.
 
-    @param news_item: Dictionary with structured news content.
+    @param query: Search string.
+    @param num_results: Number of URLs to retrieve.
+    @return: List of result URLs.
     '''
+    await scheduler.wait_backend("google")
+    loop = asyncio.get_running_loop()
     try:
-        if OUTPUT_FILE.exists():
-            with OUTPUT_FILE.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-        else:
-            data = []
+        return await loop.run_in_executor(
+            None, lambda: list(search(query, num_results=num_results))
+        )
+    except Exception as e:
+        scheduler.observe_backend("google", getattr(e, "response", None))
+        raise
 
-        data.append(news_item)
 
-        with OUTPUT_FILE.open("w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+def append_news_item(news_item: Dict):
+    '''
+    @brief Append a single news item to the result store.
 
+    Writes the item as one JSON line at the end of the store, so the cost
+    does not grow with the size of the file.
+
+    @param news_item: Dictionary with structured news content.
+    '''
+    try:
+        append_record(news_item, OUTPUT_FILE)
     except Exception as e:
         logger.error(f"Failed to append news item: {e}")
 
@@ -155,36 +162,42 @@ async def run_news_search():
     @brief Main routine to search and collect cybersecurity news articles.
 
     - Iterates over predefined dorks.
-    - Searches via Google.
-    - Extracts and filters relevant articles.
-    - Writes each relevant article to JSON immediately.
+    - Skips the URLs already stored, looked up in the persistent URL index.
+    - Searches via Google, within the rate limit of the "google" backend.
+    - Downloads the new results concurrently (bounded by FETCH_CONCURRENCY,
+      rate limited per domain) while the next dorks are searched.
+    - Extracts the articles, then scores them all in one batch and writes
+      the relevant ones to the result store.
     '''
     logger.info("Starting news search...")
+    started = time.monotonic()
 
-    seen_urls = load_existing_urls()
+    url_index = get_url_index()
+    # Canonical URLs scheduled during this run
+    scheduled = set()
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+    tasks = []
 
     for dork in DORKS:
         logger.info(f"Searching with dork: {dork}")
         try:
             results = await async_search(dork, num_results=5)
             for url in results:
-                if not url.startswith("http") or url in seen_urls:
+                if not url.startswith("http"):
                     continue
-
-                news_item = await extract_news_structure(url)
-                if news_item:
-                    append_news_item(news_item)
-                    seen_urls.add(url)
-                    logger.success(f"Added news from {url}")
-
-                await asyncio.sleep(random.uniform(2, 5))
+                canonical = canonicalize_url(url)
+                if canonical in scheduled or url_index.contains(url, ARTICLES):
+                    continue
+                scheduled.add(canonical)
+                tasks.append(asyncio.create_task(fetch_news_item(url, semaphore)))
 
         except Exception as e:
             logger.error(f"rror during search with dork '{dork}': {e}")
 
-        sleep_time = random.randint(20, 35)
-        logger.info(f"Waiting {sleep_time} seconds before next dork...")
-        await asyncio.sleep(sleep_time)
-
-    logger.info("Finished news collection.")
-
+    articles = [article for article in await asyncio.gather(*tasks) if article]
+    stored = store_relevant_news(articles)
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"Finished news collection: {stored}/{len(tasks)} articles stored "
+        f"in {elapsed:.0f}s ({stored * 60 / elapsed:.1f} articles/min)."
+    )
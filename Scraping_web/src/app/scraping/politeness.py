@@ -0,0 +1,310 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 16:32:27
+# @ Project: Cebolla
+# @ Description: Per-domain and per-backend rate limiting of the collectors.
+#
+# Instead of sleeping a random time after every request, whatever host is
+# hit, each domain and each search backend (e.g. "google") gets its own
+# token bucket. A request only waits for the bucket of its own domain, so
+# requests to different hosts run in parallel while each host still sees
+# at most `rate` requests per second (plus an optional burst).
+#
+# - robots.txt is fetched once per domain (cached for ROBOTS_TTL seconds):
+#   disallowed URLs are skipped and a `Crawl-delay` lowers the rate of the
+#   domain.
+# - A 429/503 response carrying `Retry-After` (seconds or HTTP date) blocks
+#   its domain or backend until that time.
+#
+# The buckets implement the generic cell rate algorithm: each one only keeps
+# the theoretical time of its next request, so taking a slot is O(1) and
+# safe from several threads.
+
+import asyncio
+import email.utils
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+from app.scraping.http_client import get_http_client
+
+# Default rate of a domain: requests per second and burst size
+DOMAIN_RATE = 1 / 3
+DOMAIN_BURST = 1
+# Rate and burst of each search backend
+BACKEND_RATES: Dict[str, Tuple[float, int]] = {
+    "google": (6 / 60, 1),
+}
+# Seconds a robots.txt is kept before being fetched again
+ROBOTS_TTL = 24 * 3600
+# User agent matched against the robots.txt rules
+ROBOTS_USER_AGENT = "*"
+# Upper bound of the Retry-After delays honoured (seconds)
+MAX_RETRY_AFTER = 3600
+# Delay used on 429/503 responses without a valid Retry-After (seconds)
+DEFAULT_RETRY_AFTER = 60
+
+
+class TokenBucket:
+    '''
+    @brief Token bucket of `rate` requests per second with bursts of `burst`.
+    '''
+
+    def __init__(self, rate: float, burst: int = 1):
+        '''
+        @param rate: Sustained requests per second.
+        @param burst: Requests allowed back to back after an idle period.
+        '''
+        self.rate = rate
+        self.burst = burst
+        # Theoretical time of the next request
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / self.rate
+
+    def reserve(self) -> float:
+        '''
+        @brief Takes the next free slot of the bucket.
+
+        @return: Seconds to wait before the slot starts (0 if available now).
+        '''
+        with self._lock:
+            now = time.monotonic()
+            tolerance = (self.burst - 1) * self.interval
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+            return max(0.0, slot - tolerance - now)
+
+    def defer(self, seconds: float) -> None:
+        '''
+        @brief Blocks the bucket for a number of seconds (e.g. Retry-After).
+
+        @param seconds: Seconds before the next request is allowed.
+        '''
+        with self._lock:
+            tolerance = (self.burst - 1) * self.interval
+            self._next = max(self._next, time.monotonic() + seconds + tolerance)
+
+    async def acquire(self) -> None:
+        '''
+        @brief Waits for the next free slot of the bucket.
+        '''
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    '''
+    @brief Parses a Retry-After header.
+
+    @param value: Header value, in seconds or as an HTTP date.
+    @return: Seconds to wait (bounded by MAX_RETRY_AFTER), or None if the
+    value is missing or invalid.
+    '''
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = date.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+async def fetch_robots(url: str):
+    '''
+    @brief Downloads and parses a robots.txt file.
+
+    @param url: URL of the robots.txt file.
+    @return: Protego parser, or None when there are no usable rules (missing
+    file or error), in which case everything is allowed.
+    '''
+    # Protego is the robots.txt parser used by Scrapy
+    from protego import Protego
+
+    try:
+        response = await get_http_client().get(url, timeout=5)
+    except Exception as e:
+        logger.debug(f"Cannot fetch {url}: {e}")
+        return None
+    if response.status_code != 200:
+        return None
+    return Protego.parse(response.text)
+
+
+def _domain(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class PolitenessScheduler:
+    '''
+    @brief Rate limiter with one token bucket per domain and per backend.
+
+    Usage:
+        if await scheduler.wait(url):
+            response = await client.get(url)
+            scheduler.observe(url, response)
+    '''
+
+    def __init__(
+        self,
+        domain_rate: float = DOMAIN_RATE,
+        domain_burst: int = DOMAIN_BURST,
+        backend_rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        respect_robots: bool = True,
+        user_agent: str = ROBOTS_USER_AGENT,
+    ):
+        '''
+        @param domain_rate: Requests per second allowed per domain.
+        @param domain_burst: Burst size of the domains.
+        @param backend_rates: (rate, burst) per search backend. Defaults to
+        BACKEND_RATES.
+        @param respect_robots: Whether robots.txt rules are applied.
+        @param user_agent: User agent matched against robots.txt.
+        '''
+        self.domain_rate = domain_rate
+        self.domain_burst = domain_burst
+        self.backend_rates = BACKEND_RATES if backend_rates is None else backend_rates
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self._domains: Dict[str, TokenBucket] = {}
+        self._backends: Dict[str, TokenBucket] = {}
+        # Domain -> (fetch time, parsed robots.txt or None)
+        self._robots: Dict[str, Tuple[float, object]] = {}
+        self._robots_pending: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def domain_bucket(self, domain: str) -> TokenBucket:
+        '''
+        @brief Returns the bucket of a domain, creating it if needed.
+
+        @param domain: Host name (with port, if any).
+        @return: Token bucket of the domain.
+        '''
+        with self._lock:
+            bucket = self._domains.get(domain)
+            if bucket is None:
+                bucket = TokenBucket(self.domain_rate, self.domain_burst)
+                self._domains[domain] = bucket
+            return bucket
+
+    def backend_bucket(self, backend: str) -> TokenBucket:
+        '''
+        @brief Returns the bucket of a search backend, creating it if needed.
+
+        @param backend: Backend name (e.g. "google").
+        @return: Token bucket of the backend.
+        '''
+        with self._lock:
+            bucket = self._backends.get(backend)
+            if bucket is None:
+                rate, burst = self.backend_rates.get(
+                    backend, (self.domain_rate, self.domain_burst)
+                )
+                bucket = TokenBucket(rate, burst)
+                self._backends[backend] = bucket
+            return bucket
+
+    async def robots(self, url: str):
+        '''
+        @brief Returns the robots.txt rules of the domain of a URL.
+
+        The file is fetched once per domain and ROBOTS_TTL; a Crawl-delay
+        found in it lowers the rate of the domain.
+
+        @param url: Any URL of the domain.
+        @return: Protego parser, or None if there are no rules.
+        '''
+        parts = urlsplit(url)
+        domain = parts.netloc.lower()
+        cached = self._robots.get(domain)
+        if cached and time.monotonic() - cached[0] < ROBOTS_TTL:
+            return cached[1]
+
+        # Concurrent first requests to a domain share a single download
+        task = self._robots_pending.get(domain)
+        if task is None:
+            task = asyncio.ensure_future(
+                fetch_robots(f"{parts.scheme}://{parts.netloc}/robots.txt")
+            )
+            self._robots_pending[domain] = task
+        try:
+            rules = await task
+        finally:
+            self._robots_pending.pop(domain, None)
+        self._robots[domain] = (time.monotonic(), rules)
+
+        delay = rules.crawl_delay(self.user_agent) if rules else None
+        if delay:
+            bucket = self.domain_bucket(domain)
+            bucket.rate = min(bucket.rate, 1.0 / float(delay))
+        return rules
+
+    async def wait(self, url: str) -> bool:
+        '''
+        @brief Waits until a URL may be requested.
+
+        @param url: URL about to be requested.
+        @return: False if robots.txt disallows the URL (do not request it).
+        '''
+        if self.respect_robots:
+            rules = await self.robots(url)
+            if rules is not None and not rules.can_fetch(url, self.user_agent):
+                logger.info(f"Disallowed by robots.txt: {url}")
+                return False
+        await self.domain_bucket(_domain(url)).acquire()
+        return True
+
+    async def wait_backend(self, backend: str) -> None:
+        '''
+        @brief Waits until a search backend may be queried.
+
+        @param backend: Backend name (e.g. "google").
+        '''
+        await self.backend_bucket(backend).acquire()
+
+    def observe(self, url: str, response) -> None:
+        '''
+        @brief Applies the Retry-After of a throttled response to its domain.
+
+        @param url: Requested URL.
+        @param response: HTTP response (httpx or requests).
+        '''
+        delay = self._throttle_delay(response)
+        if delay is not None:
+            logger.warning(f"{_domain(url)} throttled, pausing it for {delay:.0f}s")
+            self.domain_bucket(_domain(url)).defer(delay)
+
+    def observe_backend(self, backend: str, response) -> None:
+        '''
+        @brief Applies the Retry-After of a throttled response to a backend.
+
+        @param backend: Backend name (e.g. "google").
+        @param response: HTTP response (httpx or requests).
+        '''
+        delay = self._throttle_delay(response)
+        if delay is not None:
+            logger.warning(f"{backend} throttled, pausing it for {delay:.0f}s")
+            self.backend_bucket(backend).defer(delay)
+
+    @staticmethod
+    def _throttle_delay(response) -> Optional[float]:
+        if response is None or response.status_code not in (429, 503):
+            return None
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        return DEFAULT_RETRY_AFTER if delay is None else delay
+
+
+# Scheduler shared by the collectors, so that they share the rate limits of
+# the domains and backends they have in common
+scheduler = PolitenessScheduler()
@@ -0,0 +1,201 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 13:55:18
+# @ Project: Cebolla
+# @ Description: Weighted relevance scoring of scraped pages.
+#
+# A page is no longer kept just because one keyword appears somewhere in it.
+# Each keyword has a weight (specific terms such as "ransomware" weigh more
+# than generic ones such as "apt" or "ataque") and each field a boost (a
+# keyword in the title counts more than in a paragraph). For a batch of
+# pages the keyword counts are gathered into a (pages, fields, keywords)
+# array and scored with NumPy:
+#
+#   score = sum over fields and keywords of boost * weight * log2(1 + count)
+#
+# The logarithm makes repetitions count less than distinct terms. Pages
+# scoring below the threshold are rejected before they are indexed or sent
+# to the spaCy stage.
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.scraping.keyword_matcher import KeywordMatcher
+
+# Weight per keyword (lowercase). Keywords not listed weigh DEFAULT_WEIGHT.
+TERM_WEIGHTS: Dict[str, float] = {
+    # Specific terms: one mention in the body is enough
+    "ransomware": 2.0, "malware": 2.0, "phishing": 2.0, "spyware": 2.0,
+    "exploit": 2.0, "zero-day": 2.0, "botnet": 2.0, "ddos": 2.0,
+    "vulnerability": 2.0, "vulnerabilidad": 2.0, "sql injection": 2.0,
+    "xss": 2.0, "cross-site scripting": 2.0, "advanced persistent threat": 2.0,
+    "cyber attack": 2.0, "cybersecurity": 2.0, "ciberseguridad": 2.0,
+    "seguridad informática": 2.0, "ot security": 2.0, "data leak": 2.0,
+    "scada": 1.5, "it security": 1.5, "breach": 1.5, "hacking": 1.5,
+    "incident response": 1.5, "penetration testing": 1.5,
+    # Generic terms: frequent in unrelated pages
+    "apt": 0.5, "ataque": 0.5, "ataques": 0.5, "threat": 0.5, "threats": 0.5,
+    "encryption": 0.75, "firewall": 0.75,
+}
+DEFAULT_WEIGHT = 1.0
+
+# Boost per page field
+FIELD_BOOSTS: Dict[str, float] = {
+    "title": 3.0,
+    "h1": 2.0,
+    "h2": 1.5,
+    "h3": 1.2,
+    "h4": 1.2,
+    "h5": 1.2,
+    "h6": 1.2,
+    "p": 1.0,
+}
+
+# Minimum score for a page to be considered relevant
+RELEVANCE_THRESHOLD = 2.0
+
+
+def _field_text(page: Dict, field: str) -> str:
+    value = page.get(field)
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(item for item in value if isinstance(item, str))
+    return ""
+
+
+class RelevanceScorer:
+    """
+    Scores pages by weighted keyword occurrences per field.
+
+    Usage:
+        scorer = RelevanceScorer(CYBERSECURITY_KEYWORDS)
+        scores = scorer.score_pages(pages)
+        kept = [page for page, ok in zip(pages, scorer.accept(scores)) if ok]
+    """
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        term_weights: Optional[Dict[str, float]] = None,
+        field_boosts: Optional[Dict[str, float]] = None,
+        threshold: float = RELEVANCE_THRESHOLD,
+    ):
+        """
+        Args:
+            keywords (Iterable[str]): Keywords to look for.
+            term_weights (dict, optional): Weight per lowercase keyword.
+                Defaults to TERM_WEIGHTS.
+            field_boosts (dict, optional): Boost per page field. Defaults to
+                FIELD_BOOSTS.
+            threshold (float): Minimum score of a relevant page.
+        """
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        self.fields: List[str] = list((field_boosts or FIELD_BOOSTS).keys())
+        self.threshold = threshold
+        self.matcher = KeywordMatcher(self.keywords)
+
+        weights = TERM_WEIGHTS if term_weights is None else term_weights
+        self._keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._weights = np.array(
+            [weights.get(keyword.lower(), DEFAULT_WEIGHT) for keyword in self.keywords],
+            dtype=np.float64,
+        )
+        self._boosts = np.array(
+            [(field_boosts or FIELD_BOOSTS)[field] for field in self.fields],
+            dtype=np.float64,
+        )
+
+    def count_matrix(self, pages: List[Dict]) -> np.ndarray:
+        """
+        Count keyword occurrences per page and field.
+
+        Args:
+            pages (list[dict]): Pages with 'title' (str) and h1..h6/p (lists).
+
+        Returns:
+            np.ndarray: Array of shape (pages, fields, keywords).
+        """
+        counts = np.zeros((len(pages), len(self.fields), len(self.keywords)), dtype=np.float64)
+        for p, page in enumerate(pages):
+            for f, field in enumerate(self.fields):
+                for keyword, count in self.matcher.counts(_field_text(page, field)).items():
+                    counts[p, f, self._keyword_index[keyword]] = count
+        return counts
+
+    def score_counts(self, counts: np.ndarray) -> np.ndarray:
+        """
+        Turn a count array into one score per page.
+
+        Args:
+            counts (np.ndarray): Array of shape (pages, fields, keywords).
+
+        Returns:
+            np.ndarray: Scores of shape (pages,).
+        """
+        return np.einsum("pfk,f,k->p", np.log2(1.0 + counts), self._boosts, self._weights)
+
+    def score_pages(self, pages: List[Dict]) -> np.ndarray:
+        """
+        Score a batch of pages.
+
+        Args:
+            pages (list[dict]): Pages with 'title' (str) and h1..h6/p (lists).
+
+        Returns:
+            np.ndarray: Scores of shape (pages,).
+        """
+        if not pages:
+            return np.zeros(0, dtype=np.float64)
+        return self.score_counts(self.count_matrix(pages))
+
+    def accept(self, scores: np.ndarray) -> np.ndarray:
+        """
+        Tell which scores reach the threshold.
+
+        Args:
+            scores (np.ndarray): Scores returned by `score_pages`.
+
+        Returns:
+            np.ndarray: Boolean mask of the relevant pages.
+        """
+        return scores >= self.threshold
+
+    def evaluate_pages(self, pages: List[Dict]) -> List[tuple]:
+        """
+        Score a batch of pages at once and report the keywords found in each.
+
+        Args:
+            pages (list[dict]): Pages with 'title' (str) and h1..h6/p (lists).
+
+        Returns:
+            list[tuple]: Per page, (score (float), relevant (bool), keyword
+            counts (dict)).
+        """
+        if not pages:
+            return []
+        counts = self.count_matrix(pages)
+        scores = self.score_counts(counts)
+        relevant = self.accept(scores)
+        # Keyword totals over the fields, shape (pages, keywords)
+        totals = counts.sum(axis=1)
+        return [
+            (
+                float(scores[p]),
+                bool(relevant[p]),
+                {self.keywords[k]: int(totals[p, k]) for k in np.flatnonzero(totals[p])},
+            )
+            for p in range(len(pages))
+        ]
+
+    def evaluate(self, page: Dict) -> tuple:
+        """
+        Score a single page and report the keywords found in it.
+
+        Args:
+            page (dict): Page with 'title' (str) and h1..h6/p (lists).
+
+        Returns:
+            tuple: (score (float), relevant (bool), keyword counts (dict)).
+        """
+        return self.evaluate_pages([page])[0]
@@ -9,29 +9,37 @@
 #
 # The module also manages the execution of the spider:
 # - Once via `run_dynamic_spider()` with a static list of URLs
-# - Continuously via `run_dynamic_spider_from_db()`, which pulls fresh URLs
-#   from a PostgreSQL database using an asyncpg connection pool.
+# - Continuously via `run_dynamic_spider_from_db()`, which leases batches of
+#   URLs from the PostgreSQL crawl queue (app.models.crawl_queue) using an
+#   asyncpg connection pool.
 #
-# Extracted data is saved locally in JSON format for further processing or a
-# nalysis.
+# Extracted data is appended locally to a JSON Lines store for further
+# processing or analysis.
 
+from scrapy import Request
 from scrapy.spiders import Spider
 from scrapy.crawler import CrawlerProcess
-from app.models.ttrss_postgre_db import get_entry_links,mark_entry_as_viewed
-from app.utils.utils import get_connection_parameters,create_config_file
-from app.models.opensearh_db import store_in_opensearch
-from multiprocessing import Process
+from app.models.ttrss_postgre_db import mark_entries_as_viewed
+from app.models.crawl_queue import (
+    ack_jobs, enqueue_unread_entries, ensure_crawl_queue, fail_jobs, lease_jobs,
+)
+from app.models.opensearh_db import OpenSearchBulkWriter,load_opensearch_parameters
+from app.utils.jsonl_store import OUTPUT_FILE, append_record, lock_metrics
+from app.models.url_index import ARTICLES, get_url_index
+from app.scraping.relevance import RelevanceScorer
+from app.scraping.html_extract import extract_structure
+from app.scraping.spider_pool import SpiderPool
+from app.scraping.crawl_profiles import load_crawl_profile, report_crawl
+from app.scraping.crawler_service import CRAWLER_SETTINGS
 import asyncio
+import os
+import socket
+import time
 import logging
 from scrapy.utils.log import configure_logging
 from typing import Type, Coroutine, Any
 from loguru import logger
 
-# Lock file name to manage concurrent write access to JSON output
-LOCKFILE = "result.json.lock"
-# Output JSON file name
-OUTPUT_FILE = "./outputs/result.json"
-
 CYBERSECURITY_KEYWORDS = [
     "ciberseguridad", "cybersecurity", "malware", "ransomware", "phishing",
     "hacking", "vulnerabilidad", "vulnerability", "ataque", "ataques", "exploit",
@@ -43,80 +51,40 @@ CYBERSECURITY_KEYWORDS = [
     "cyber war", "advanced persistent threat", "apt", "cyber intelligence", "siem","sql injection", "xss"
     , "cross-site scripting"
 ]
+# Compiled once and shared by every page of the crawl
+CYBERSECURITY_SCORER = RelevanceScorer(CYBERSECURITY_KEYWORDS)
 
-def write_json_array_with_lock(data, filename=OUTPUT_FILE, lockfile=LOCKFILE):
-    """
-    Writes data into a single JSON array file with each JSON object on one line.
-    Uses file-based locking to prevent concurrent writes.
-
-    If file doesn't exist, creates it with an array containing the first data object.
-    If file exists, inserts the new data before the closing ] with a comma separator.
-
-    Args:
-        data (dict): The scraped data to write.
-        filename (str): Path to the JSON file.
-        lockfile (str): Path to the lock file.
-    """
-    import os
-    import time
-    import json
-
-    while os.path.exists(lockfile):
-        time.sleep(0.1)
-
-    with open(lockfile, "w") as f_lock:
-        f_lock.write("locked")
-
-    try:
-        if not os.path.exists(filename):
-            with open(filename, "w", encoding="utf8") as f:
-                f.write("[\n")
-                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
-                f.write("\n]")
-        else:
-            with open(filename, "r+", encoding="utf8") as f:
-                f.seek(0, os.SEEK_END)
-                pos = f.tell() - 1
-
-                while pos > 0:
-                    f.seek(pos)
-                    char = f.read(1)
-                    if char == ']':
-                        break
-                    pos -= 1
-
-                if pos <= 0:
-                    # Malformed file fallback
-                    f.seek(0, os.SEEK_END)
-                    f.write(",\n")
-                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
-                    f.write("\n]")
-                else:
-                    f.seek(pos)
-                    f.truncate()
-                    f.write(",\n")
-                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
-                    f.write("\n]")
-    finally:
-        os.remove(lockfile)
+# Crawl jobs leased per spider worker
+SPIDER_BATCH_SIZE = 500
 
+# Seconds between two copies of the unread entries into the crawl queue
+ENQUEUE_INTERVAL = 93600
+# Seconds between two polls of the crawl queue once it is empty
+QUEUE_POLL_INTERVAL = 300
 
-def create_dynamic_spider(urls,parameters) -> Type[Spider]:
+def create_dynamic_spider(urls,parameters,output_queue=None,done_queue=None) -> Type[Spider]:
     """
     Creates a dynamic Scrapy spider class for extracting content from a list
     of URLs.
 
     This function defines and returns a custom Scrapy Spider class that
-    processes each URL by extracting:
+    processes each URL by extracting, in a single pass over the parsed page:
       - The page title
       - All text content inside header tags (h1–h6) and paragraph tags (p)
-      - Writes scraped data into a JSON file with manual file locking
-      - Marks the URL as scraped in the database opening and closing
-        a connection for each URL.
+      - Appends scraped data to the JSON Lines output store
+      - Indexes relevant pages in OpenSearch through a bulk writer that is
+        flushed when the spider closes.
+      - Reports every URL fetched successfully on `done_queue`, so the
+        caller marks it as viewed in the database.
 
     Args:
         urls (list[str]): A list of URLs to crawl.
-        db_config (dict): Configuration dict for asyncpg connection parameters.
+        parameters (tuple): A tuple of parameters to connect to the OpenSearch database.
+        output_queue (multiprocessing.Queue, optional): Queue of the output
+            writer process. If not given, items are appended to the store
+            directly under its file lock.
+        done_queue (multiprocessing.Queue, optional): Queue receiving the
+            start URL of every page fetched successfully.
 
     Returns:
         Type[Spider]: A dynamically created Scrapy Spider class.
@@ -126,26 +94,45 @@ def create_dynamic_spider(urls,parameters) -> Type[Spider]:
         name = "dynamic_spider"
         start_urls = urls
 
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            # Relevant pages are indexed in bulk instead of one request each
+            self.writer = OpenSearchBulkWriter(parameters[0], parameters[1], "scrapy_documents")
+
+        def start_requests(self):
+            for url in self.start_urls:
+                # The entry link is kept through redirects (meta is copied)
+                yield Request(url, meta={"entry_link": url}, dont_filter=True)
+
+        def closed(self, reason):
+            self.writer.close()
+            if output_queue is None:
+                logger.info(f"Output store lock metrics: {lock_metrics.snapshot()}")
+
         def parse(self, response):
-            data = {
-                "url": response.url,
-                "title": response.css("title::text").get(default="Untitled")
-            }
-            full_text = data["title"].lower()
-            for tag in ["h1", "h2", "h3", "h4", "h5", "h6", "p"]:
-                elements = response.css(f"{tag}::text").getall()
-                clean_elements = [e.strip() for e in elements if e.strip()]
-                data[tag] = clean_elements
-                full_text += " " + " ".join(clean_elements).lower()
-
-            # Check if any cybersecurity keyword is in the text
-            if any(keyword in full_text for keyword in CYBERSECURITY_KEYWORDS):
-                write_json_array_with_lock(data)
-                store_in_opensearch(data,parameters[0],parameters[1],"scrapy_documents")
+            # One pass over the tree parsel already built for the response
+            entry_link = response.meta.get("entry_link", response.url)
+            if done_queue is not None:
+                done_queue.put(entry_link)
+
+            data = extract_structure(response.selector.root, response.url, "Untitled")
+
+            # Weighted keyword score, boosted for titles and headers
+            score, relevant, keyword_counts = CYBERSECURITY_SCORER.evaluate(data)
+            if relevant:
+                data["keywords"] = keyword_counts
+                data["relevance_score"] = round(score, 3)
+                if output_queue is not None:
+                    output_queue.put(data)
+                else:
+                    append_record(data, OUTPUT_FILE)
+                self.writer.add(data)
+                # Both the requested URL and the final one (after redirects)
+                get_url_index().add_many([entry_link, response.url], ARTICLES)
                 logger.info(f"URL relacionada con ciberseguridad: {response.url}")
                 yield data
             else:
-                logger.info(f"Descartada (no relevante): {response.url}")
+                logger.info(f"Descartada (no relevante, score {score:.2f}): {response.url}")
             logger.info(f"URL: {response.url} scrapeada")
 
 
@@ -155,116 +142,205 @@ def create_dynamic_spider(urls,parameters) -> Type[Spider]:
     return DynamicSpider
 
 
-def run_dynamic_spider(urls,parameters) -> None:
+def run_dynamic_spider(urls,parameters,output_queue=None,done_queue=None) -> None:
     """
     Runs a dynamically generated Scrapy spider to scrape content from a list
     of URLs.
 
     This function sets up logging and Scrapy settings, creates a dynamic
     spider using the provided URLs, and launches a Scrapy crawler process with
-    that spider.
+    that spider. It is the one-shot counterpart of the crawler services
+    used by the spider pool, and shares their CRAWLER_SETTINGS.
 
     Features configured:
         - Disables default Scrapy logging to avoid console clutter.
         - Sets a realistic user-agent string for better scraping reliability.
-        - Enables a download delay and auto-throttling to reduce server load.
+        - Takes delay, concurrency, auto-throttling, DNS cache and timeouts
+          from the configured crawl profile (see crawl_profiles).
         - Configures retries for transient HTTP errors (e.g., 429, 503).
-        - Writes scraped data into a local JSON file ("result.json") using
-          manual file locking to avoid concurrency problems.
+        - Appends scraped data to the local JSON Lines store
+          ("result.jsonl"), one line per page.
 
     Args:
         urls (list[str]): A list of web URLs to be scraped.
         parameters (tuple): A tuple of parameters to connect to the OpenSearch database.
+        output_queue (multiprocessing.Queue, optional): Queue of the output
+            writer process that stores the scraped items.
+        done_queue (multiprocessing.Queue, optional): Queue receiving the
+            URLs fetched successfully.
     """
     configure_logging(install_root_handler=False)
     logging.getLogger('scrapy').propagate = False
     logging.getLogger().setLevel(logging.CRITICAL)
 
-    DynamicSpider = create_dynamic_spider(urls,parameters)
-
-    process = CrawlerProcess(settings={
-        "LOG_ENABLED": False,
-        "USER_AGENT": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-            "(KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
-        ),
-        "DOWNLOAD_DELAY": 2.0,  # 2 seconds between requests
-        "AUTOTHROTTLE_ENABLED": True,  # Adjusts delay based on load
-        "RETRY_ENABLED": True,
-        "RETRY_TIMES": 5,  # Retry failed requests up to 5 times
-        "RETRY_HTTP_CODES": [429, 500, 502, 503, 504],
-        # No FEEDS or ITEM_PIPELINES used here because writing is manual
-    })
-
-    process.crawl(DynamicSpider)
+    DynamicSpider = create_dynamic_spider(urls,parameters,output_queue,done_queue)
+    profile, profile_settings = load_crawl_profile()
+
+    # Same settings as the crawler services; no FEEDS or ITEM_PIPELINES
+    # used here because writing is manual
+    process = CrawlerProcess(settings={**CRAWLER_SETTINGS, **profile_settings})
+
+    crawler = process.create_crawler(DynamicSpider)
+    process.crawl(crawler)
     process.start()
+    report_crawl(crawler, profile)
     logger.info("Urls scrapeadas")
 
 
-async def run_dynamic_spider_from_db(pool) -> Coroutine[Any, Any, None]:
+async def complete_jobs(pool, jobs_by_url: dict, urls: list) -> int:
+    """
+    Acknowledge the jobs of the fetched URLs and mark their entries as
+    viewed, in one transaction.
+
+    Args:
+        pool (asyncpg.pool.Pool): The asyncpg connection pool.
+        jobs_by_url (dict): Leased jobs by URL.
+        urls (list[str]): Fetched URLs.
+
+    Returns:
+        int: Number of entries marked as viewed.
+    """
+    if not urls:
+        return 0
+    job_ids = [jobs_by_url[url]["id"] for url in urls if url in jobs_by_url]
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await ack_jobs(conn, job_ids)
+            return await mark_entries_as_viewed(conn, urls)
+
+
+async def crawl_job_batch(pool, jobs, parameters, spider_pool: SpiderPool, slot: int) -> int:
+    """
+    Crawl one batch of leased jobs on one worker of the spider pool.
+
+    Jobs whose URL was already scraped (per the URL index) are completed
+    right away. The others are completed as soon as a worker reports them
+    fetched; the rest are failed and retried later with backoff.
+
+    Args:
+        pool (asyncpg.pool.Pool): The asyncpg connection pool.
+        jobs (list[dict]): Leased crawl jobs.
+        parameters (tuple): OpenSearch connection parameters.
+        spider_pool (SpiderPool): Worker processes running the spiders.
+        slot (int): Worker slot crawling the batch, the shard the jobs were
+            leased for.
+
+    Returns:
+        int: Number of jobs fetched successfully.
+    """
+    jobs_by_url = {job["url"]: job for job in jobs}
+    # Skip the pages already scraped (and duplicates in the batch)
+    new_urls = get_url_index().filter_new(list(jobs_by_url), ARTICLES)
+    logger.info(f"{len(new_urls)} of {len(jobs)} URLs not scraped yet")
+    pending = set(new_urls)
+    await complete_jobs(pool, jobs_by_url, [url for url in jobs_by_url if url not in pending])
+
+    if not new_urls:
+        return 0
+
+    async def on_fetched(urls):
+        await complete_jobs(pool, jobs_by_url, urls)
+
+    fetched = await spider_pool.run_slot(slot, new_urls, parameters, on_fetched)
+
+    failed = [jobs_by_url[url]["id"] for url in new_urls if url not in fetched]
+    if failed:
+        async with pool.acquire() as conn:
+            await fail_jobs(conn, failed, "Not fetched by the spider")
+    return len(fetched)
+
+
+async def crawl_slot_jobs(pool, parameters, spider_pool: SpiderPool, slot: int, worker: str) -> tuple:
+    """
+    Lease and crawl the jobs of one worker slot until its share of the
+    crawl queue is empty.
+
+    Each slot leases only the jobs whose domain hashes to it, and leases its
+    next batch as soon as the previous one is crawled, independently of the
+    other slots.
+
+    Args:
+        pool (asyncpg.pool.Pool): The asyncpg connection pool.
+        parameters (tuple): OpenSearch connection parameters.
+        spider_pool (SpiderPool): Worker processes running the spiders.
+        slot (int): Worker slot fed by this loop.
+        worker (str): Identifier of the app instance, stored with the leases.
+
+    Returns:
+        tuple: (jobs leased, jobs fetched successfully).
+    """
+    found = 0
+    fetched = 0
+    while True:
+        async with pool.acquire() as conn:
+            jobs = await lease_jobs(
+                conn, SPIDER_BATCH_SIZE, f"{worker}/{slot}",
+                shard=slot, shards=spider_pool.size
+            )
+        if not jobs:
+            return found, fetched
+        found += len(jobs)
+        logger.info(f"Worker {slot}: {len(jobs)} found to scraped ({found} so far)")
+        fetched += await crawl_job_batch(pool, jobs, parameters, spider_pool, slot)
+
+
+async def run_dynamic_spider_from_db(pool, output_queue=None, spider_pool=None) -> Coroutine[Any, Any, None]:
     """
     Creates and returns an asynchronous function that continuously runs the
     dynamic Scrapy spider.
 
     This function:
-    - Periodically acquires URLs from a PostgreSQL connection pool.
-    - Spawns a separate process to run a Scrapy spider using those URLs.
-    - Waits 60 seconds before repeating the process.
+    - Copies the unread entry links from PostgreSQL into the durable crawl
+      queue (`crawl_jobs`) every ENQUEUE_INTERVAL seconds.
+    - Runs one leasing loop per worker of a supervised pool of long-lived
+      crawler processes: each loop leases batches of SPIDER_BATCH_SIZE jobs
+      of its own share of the domains (FOR UPDATE SKIP LOCKED, so several
+      app instances can share the queue) and leases the next batch as soon
+      as its worker is done, whatever the other workers are doing.
+    - Acknowledges the jobs fetched successfully and marks their entries as
+      viewed; failed jobs are retried with exponential backoff.
+    - Polls the queue every QUEUE_POLL_INTERVAL seconds once it is empty.
 
     Args:
         pool (asyncpg.pool.Pool): The asyncpg connection pool for database
         access.
+        output_queue (multiprocessing.Queue, optional): Queue of the output
+        writer process shared by every spider run.
+        spider_pool (SpiderPool, optional): Worker pool running the spiders.
+        Defaults to a new pool with one worker per core.
 
     Returns:
         None.
     """
+    if spider_pool is None:
+        spider_pool = SpiderPool(create_dynamic_spider, output_queue=output_queue)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    async with pool.acquire() as conn:
+        await ensure_crawl_queue(conn)
+
     number=0
+    last_enqueue = None
     while True:
-        logger.info(f"Scraped lap {number}")
-        async with pool.acquire() as conn:
-            urls = await get_entry_links(conn)
-            if not urls:
-                logger.info("No URLs found to process.")
-            else:
-                logger.info(f"{len(urls)} found to scraped")
-                # Obtain the parameters for the OpenSearch database
-                parameters: tuple = (
-                    'localhost',
-                    9200
-                )
-                file_name: str = 'cfg.ini'
-                file_content: list[str] = [
-                    '# Configuration file.\n',
-                    '# This file contains the parameters for connecting to the opensearch database server.\n',
-                    '# ONLY one uncommented line is allowed.\n',
-                    '# The valid line format is: server_ip,server_port\n',
-                    f'{parameters[0]};{parameters[1]}\n'
-                ]
-
-                # Get the connection parameters or assign default ones
-                retorno_otros = get_connection_parameters(file_name)
-                logger.info(retorno_otros[1])
-
-                if retorno_otros[0] != 0:
-                    logger.info('Recreating configuration file...')
-                    retorno_otros = create_config_file(file_name, file_content)
-                    logger.info(retorno_otros[1])
-                    # If the file had to be recreated, default values will be used
-
-                    if retorno_otros[0] != 0:
-                        logger.error('Configuration file missing. Execution cannot continue without a configuration file.')
-                        return
-                else:
-                    parameters = retorno_otros[2]  # Get parameters read from the config file
-
-                for url in urls:
-                    await mark_entry_as_viewed(conn, url)
-                urls_def=[]
-                urls_def = urls_def + [url for url in urls if url not in urls_def]
-                # Run the spider in a separate process (avoids signal issues)
-                p = Process(target=run_dynamic_spider, args=(urls,parameters))
-                p.start()
-
-        logger.info("Waiting for next run...")
-        await asyncio.sleep(93600)
-        number+=1
\ No newline at end of file
+        if last_enqueue is None or time.monotonic() - last_enqueue >= ENQUEUE_INTERVAL:
+            async with pool.acquire() as conn:
+                enqueued = await enqueue_unread_entries(conn)
+            last_enqueue = time.monotonic()
+            logger.info(f"{enqueued} new crawl jobs from unread entries")
+
+        # Obtain the parameters for the OpenSearch database
+        parameters = load_opensearch_parameters()
+        if parameters is None:
+            return
+
+        # One leasing loop per worker slot, each refilled on its own
+        results = await asyncio.gather(*(
+            crawl_slot_jobs(pool, parameters, spider_pool, slot, worker)
+            for slot in range(spider_pool.size)
+        ))
+        found = sum(result[0] for result in results)
+        fetched = sum(result[1] for result in results)
+        if found:
+            logger.info(f"Scraped lap {number}: {fetched} of {found} crawl jobs fetched")
+            number+=1
+
+        await asyncio.sleep(QUEUE_POLL_INTERVAL)
@@ -0,0 +1,197 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 19:26:08
+# @ Project: Cebolla
+# @ Description: Supervised pool of spider worker processes.
+#
+# Each worker slot is fed on its own with run_slot(): the crawl loop of
+# spider_factory leases the jobs of each slot's share of the domains
+# separately (app.models.crawl_queue.lease_jobs with a shard, which maps a
+# domain to a slot by its PostgreSQL hash), so every page of a domain is
+# crawled by the same worker and Scrapy's per-domain throttling keeps
+# working, while different domains are crawled in parallel on up to `size`
+# cores. A slot is refilled as soon as it is done, so a slot busy with a
+# large domain never keeps the other workers idle.
+#
+# Each worker is a long-lived crawler service
+# (app.scraping.crawler_service) with its reactor already running, so a
+# shard starts crawling right away instead of after a new process and
+# Scrapy startup. The supervisor drains the URLs each worker reports as
+# fetched, retries the URLs not fetched yet when a crawl fails or its
+# worker crashes (the worker is restarted), and keeps throughput statistics
+# per worker.
+#
+# Scaling across machines goes through the PostgreSQL crawl queue
+# (app.models.crawl_queue): every app instance runs its own pool and leases
+# its own batches.
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.scraping.crawler_service import CrawlerService, CrawlJob
+
+# Default number of worker processes
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Times the shard of a failed or crashed worker is retried within a batch
+MAX_RESTARTS = 2
+# Seconds between two checks of the workers
+SUPERVISE_INTERVAL = 0.2
+
+
+class _Shard:
+    def __init__(self, slot: int, urls: List[str], restarts: int, job: CrawlJob):
+        self.slot = slot
+        self.urls = urls
+        self.restarts = restarts
+        self.job = job
+        self.fetched: set = set()
+
+
+class SpiderPool:
+    """
+    Runs batches of URLs on a supervised pool of crawler services.
+
+    Usage:
+        spider_pool = SpiderPool(create_dynamic_spider, size=4)
+        fetched = await spider_pool.run_slot(slot, urls, parameters, on_fetched)
+        spider_pool.close()
+    """
+
+    def __init__(
+        self,
+        spider_factory: Callable,
+        size: int = DEFAULT_WORKERS,
+        output_queue=None,
+    ):
+        """
+        Args:
+            spider_factory (Callable): Module-level function building the
+                Spider class in a worker, called as
+                spider_factory(urls, parameters, done_queue=..., output_queue=...);
+                its spiders must put every URL fetched successfully on
+                done_queue.
+            size (int): Number of worker processes.
+            output_queue (multiprocessing.Queue, optional): Queue of the
+                output writer process, passed to every worker.
+        """
+        self.spider_factory = spider_factory
+        self.size = max(1, size)
+        self.output_queue = output_queue
+        # A worker runs one shard at a time; the slots run independently
+        self._slot_locks = [asyncio.Lock() for _ in range(self.size)]
+        # Workers are started on their first shard and then kept running
+        self._services = [
+            CrawlerService(output_queue, name=f"spider-{slot}")
+            for slot in range(self.size)
+        ]
+        self._stats: Dict[int, dict] = {
+            slot: {
+                "slot": slot, "runs": 0, "restarts": 0, "urls": 0,
+                "fetched": 0, "busy_seconds": 0.0, "last_exit_code": None,
+                "last_report": None,
+            }
+            for slot in range(self.size)
+        }
+
+    def _submit(self, slot: int, urls: List[str], parameters, restarts: int = 0) -> _Shard:
+        job = self._services[slot].submit(self.spider_factory, urls, parameters)
+        stats = self._stats[slot]
+        stats["runs"] += 1
+        stats["urls"] += len(urls)
+        return _Shard(slot, urls, restarts, job)
+
+    def _finish(self, shard: _Shard) -> None:
+        stats = self._stats[shard.slot]
+        stats["busy_seconds"] += shard.job.finished_at - shard.job.submitted
+        if shard.job.report is not None:
+            stats["last_report"] = shard.job.report
+
+    async def run_slot(
+        self,
+        slot: int,
+        urls: List[str],
+        parameters,
+        on_fetched: Optional[Callable[[List[str]], Awaitable]] = None,
+    ) -> set:
+        """
+        Crawl URLs on one worker, retrying the URLs not fetched yet if the
+        crawl fails or the worker crashes. Different slots run concurrently.
+
+        Args:
+            slot (int): Worker slot, from 0 to size - 1.
+            urls (list[str]): URLs to crawl.
+            parameters (tuple): OpenSearch connection parameters.
+            on_fetched (Callable, optional): Coroutine function called with
+                each group of URLs reported as fetched.
+
+        Returns:
+            set: URLs fetched successfully.
+        """
+        service = self._services[slot]
+        async with self._slot_locks[slot]:
+            shard = self._submit(slot, urls, parameters)
+            fetched = set()
+            while True:
+                service.poll()
+                batch = shard.job.take_items()
+                if batch:
+                    shard.fetched.update(batch)
+                    fetched.update(batch)
+                    self._stats[slot]["fetched"] += len(batch)
+                    if on_fetched is not None:
+                        await on_fetched(batch)
+                if not shard.job.done:
+                    await asyncio.sleep(SUPERVISE_INTERVAL)
+                    continue
+
+                self._finish(shard)
+                remaining = [url for url in shard.urls if url not in shard.fetched]
+                if not service.is_alive():
+                    self._stats[slot]["last_exit_code"] = service.exitcode
+                if not (shard.job.error and remaining and shard.restarts < MAX_RESTARTS):
+                    return fetched
+                logger.warning(
+                    f"Spider worker {slot} failed ({shard.job.error}), "
+                    f"retrying {len(remaining)} URLs"
+                )
+                self._stats[slot]["restarts"] += 1
+                # submit() starts a new process if this one died
+                shard = self._submit(slot, remaining, parameters, shard.restarts + 1)
+
+    def close(self, timeout: float = 30) -> None:
+        """
+        Stop the worker processes: all of them are asked to stop first, so
+        they finish their crawls in parallel, then they are joined.
+
+        Args:
+            timeout (float): Seconds to wait for all of them before
+                terminating the ones still running.
+        """
+        for service in self._services:
+            service.request_stop()
+        deadline = time.monotonic() + timeout
+        for service in self._services:
+            service.stop(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> List[dict]:
+        """
+        Return the statistics of every worker slot.
+
+        Returns:
+            list[dict]: Per worker: process, crawls run, retries, URLs
+            assigned and fetched, busy time, pages per second of busy time
+            and the report of its last crawl.
+        """
+        result = []
+        for slot, stats in self._stats.items():
+            service = self._services[slot]
+            values = dict(stats)
+            values["alive"] = service.is_alive()
+            values["pid"] = service.pid
+            busy = values["busy_seconds"]
+            values["pages_per_sec"] = round(values["fetched"] / busy, 3) if busy else 0.0
+            result.append(values)
+        return result
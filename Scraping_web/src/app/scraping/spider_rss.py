@@ -12,8 +12,8 @@
 # - Reading URLs from a local file to scan for RSS feeds.
 # - Dynamically creating and running a Scrapy spider that detects RSS/Atom/XML
 # feeds via <link> tags.
-# - Running the spider asynchronously with multiprocessing to handle multiple
-# URLs concurrently.
+# - Running the spider on a long-lived crawler service process (one running
+# reactor), so a discovery run does not pay the Scrapy startup again.
 # - Parsing each discovered feed to extract essential metadata.
 # - Inserting extracted feed data into the PostgreSQL database with proper
 # error handling.
@@ -25,14 +25,16 @@
 
 
 import feedparser
-from scrapy.crawler import CrawlerProcess
 from scrapy.spiders import Spider
 from app.models.ttrss_postgre_db import insert_feed_to_db, FeedCreateRequest
-from multiprocessing import Process, Queue
-from scrapy.utils.log import configure_logging
+from app.scraping.feed_fetch import commit_feed, fetch_feed
+from app.scraping.crawler_service import get_crawler_service
 from typing import List, Type
 from loguru import logger
 
+# Consumer name of the feed insertion in the feed cache
+FEED_CONSUMER = "rss_feeds"
+
 def read_urls_from_file(file_path) -> List[str] | List:
     """
     Reads a list of URLs from a text file.
@@ -56,7 +58,7 @@ def read_urls_from_file(file_path) -> List[str] | List:
         logger.error(f"Error reading file: {e}")
         return []
 
-def create_rss_spider(urls, results)-> Type[Spider]:
+def create_rss_spider(urls, results=None, done_queue=None)-> Type[Spider]:
     """
     Dynamically creates a Scrapy spider class to extract RSS/Atom/XML feed
     links from a list of URLs.
@@ -69,12 +71,17 @@ def create_rss_spider(urls, results)-> Type[Spider]:
 
     Args:
         urls (List[str]): A list of web page URLs to scan for RSS feeds.
-        results (List[str]): A mutable list to which discovered feed URLs will
-        be appended.
+        results (List[str], optional): A mutable list to which discovered feed
+        URLs will be appended.
+        done_queue (Queue, optional): Queue receiving every discovered feed
+        URL (used by the crawler service).
 
     Returns:
         Type[Spider]: A Scrapy spider class configured to extract feed URLs.
     """
+    if results is None:
+        results = []
+
     class RSSSpider(Spider):
         name = "rss_spider"
         start_urls = urls
@@ -87,47 +94,11 @@ def create_rss_spider(urls, results)-> Type[Spider]:
                     full_url = response.urljoin(href)
                     if full_url not in results:
                         results.append(full_url)
+                        if done_queue is not None:
+                            done_queue.put(full_url)
                         logger.info(f"RSS found: {full_url}")
     return RSSSpider
 
-def run_rss_spider(urls, queue) -> None:
-    """
-    Runs a Scrapy spider to discover RSS or Atom feed URLs from a list of
-    websites.
-
-    This function configures logging, creates a spider using
-    `create_rss_spider`, and runs it in a Scrapy `CrawlerProces`.
-    Once crawling is complete, the discovered RSS feed URLs are pushed into a
-    multiprocessing queue for further use.
-
-    Args:
-        urls (List[str]): A list of web page URLs to scan for RSS/Atom feed
-        links. queue (Queue): A multiprocessing queue where the discovered
-        feed URLs will be stored.
-    """
-
-    configure_logging({'LOG_LEVEL': 'ERROR'})
-    results = []
-    spider = create_rss_spider(urls, results)
-
-    process = CrawlerProcess(settings={
-        "USER_AGENT": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/122.0.0.0 Safari/537.36"
-        ),
-        "DOWNLOAD_DELAY": 2.0,
-        "AUTOTHROTTLE_ENABLED": True,
-        "RETRY_ENABLED": True,
-        "RETRY_TIMES": 5,
-        "RETRY_HTTP_CODES": [429, 500, 502, 503, 504],
-        "LOG_ENABLED": False
-    })
-
-    process.crawl(spider)
-    process.start()
-    queue.put(results)
-
 async def extract_rss_and_save(pool, file_path) -> None:
     """
     Extracts RSS/Atom feed URLs from a list of websites and stores valid feeds
@@ -135,9 +106,11 @@ async def extract_rss_and_save(pool, file_path) -> None:
 
     This function:
     - Reads website URLs from a local file.
-    - Uses a multiprocessing Scrapy spider to discover RSS/Atom feeds from
-      those websites.
-    - Parses each discovered feed using `feedparser`.
+    - Discovers RSS/Atom feeds from those websites with a spider run on the
+      shared crawler service (no new process or reactor per call).
+    - Downloads each discovered feed with a conditional GET; feeds that did
+      not change since they were last inserted are skipped.
+    - Parses each changed feed using `feedparser`.
     - Extracts metadata such as the title and site URL.
     - Constructs a `FeedCreateRequest` and inserts the feed into the database
     via `insert_feed_to_db`.
@@ -155,17 +128,23 @@ async def extract_rss_and_save(pool, file_path) -> None:
         print("No URLs found to process.")
         return
 
-    queue = Queue()
-    p = Process(target=run_rss_spider, args=(urls, queue))
-    p.start()
-    p.join()
-
-    results = queue.get()
+    service = get_crawler_service()
+    job = await service.wait(service.submit(create_rss_spider, urls))
+    if job.error:
+        logger.error(f"RSS discovery failed: {job.error}")
+    results = job.items
 
     async with pool.acquire() as conn:
         for feed_url in results:
             try:
-                feed = feedparser.parse(feed_url)
+                fetch = await fetch_feed(feed_url, FEED_CONSUMER)
+                if not fetch.changed:
+                    logger.debug(f"Feed unchanged, skipped: {feed_url}")
+                    continue
+
+                feed = feedparser.parse(
+                    fetch.body, response_headers={"content-type": fetch.content_type}
+                )
                 if not feed.entries:
                     logger.warning(f"⚠️  No entries found in {feed_url}")
                     continue
@@ -182,6 +161,7 @@ async def extract_rss_and_save(pool, file_path) -> None:
                 )
 
                 await insert_feed_to_db(conn, feed_data)
+                commit_feed(fetch, title)
                 logger.info(f"✅ Feed inserted: {feed_url}")
 
             except Exception as e:
@@ -0,0 +1,93 @@
+## \file checkpoint.py
+## \brief Persisted cursor that lets the NLP job label only the records appended since its last run.
+
+
+import hashlib
+import json
+import os
+from loguru import logger
+from app.utils.jsonl_store import segment_path
+
+# Bytes before the cursor hashed to detect a store that was rewritten
+DIGEST_WINDOW = 4096
+
+
+def checkpoint_path_for(input_path):
+    '''
+    @brief Builds the path of the checkpoint file associated with an input file.
+    @param input_path Path to the input JSON Lines store.
+    @return Path of the checkpoint file.
+    '''
+    return f"{input_path}.checkpoint"
+
+
+def cursor_digest(input_path, cursor):
+    '''
+    @brief Hashes the bytes just before a cursor in the store.
+    @param input_path Path to the input JSON Lines store.
+    @param cursor Tuple (segment index, byte offset).
+    @return Hex SHA-256 digest, or None if the segment is shorter than the offset.
+    '''
+    index, offset = cursor
+    path = segment_path(input_path, index)
+    if not os.path.exists(path) or os.path.getsize(path) < offset:
+        return None
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - DIGEST_WINDOW))
+        return hashlib.sha256(f.read(min(offset, DIGEST_WINDOW))).hexdigest()
+
+
+def load_checkpoint(checkpoint_path):
+    '''
+    @brief Reads a checkpoint file.
+    @param checkpoint_path Path of the checkpoint file.
+    @return Dict with 'segment', 'offset' and 'digest', or None if missing or unreadable.
+    '''
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if (isinstance(checkpoint.get("segment"), int) and isinstance(checkpoint.get("offset"), int)
+                and isinstance(checkpoint.get("digest"), str)):
+            return checkpoint
+    except (OSError, ValueError) as e:
+        logger.warning(f"Checkpoint {checkpoint_path} unreadable, ignoring it: {e}")
+    return None
+
+
+def save_checkpoint(checkpoint_path, input_path, cursor):
+    '''
+    @brief Atomically writes a checkpoint file.
+    @param checkpoint_path Path of the checkpoint file.
+    @param input_path Path to the input JSON Lines store.
+    @param cursor Tuple (segment index, byte offset) reached by the run.
+    '''
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "segment": cursor[0],
+            "offset": cursor[1],
+            "digest": cursor_digest(input_path, cursor)
+        }, f)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def resume_cursor(input_path, checkpoint):
+    '''
+    @brief Determines where the next run has to start reading the store.
+    @details The bytes right before the stored cursor are hashed again and compared
+    with the stored digest. If they changed (the store was truncated or rewritten,
+    not just appended to), the store is processed again from the beginning.
+    @param input_path Path to the input JSON Lines store.
+    @param checkpoint Checkpoint previously loaded, or None.
+    @return Tuple (segment index, byte offset) to start from.
+    '''
+    if checkpoint is None:
+        return (0, 0)
+
+    cursor = (checkpoint["segment"], checkpoint["offset"])
+    if cursor_digest(input_path, cursor) != checkpoint["digest"]:
+        logger.warning("Input file changed since the last checkpoint. Processing it from the beginning.")
+        return (0, 0)
+    return cursor
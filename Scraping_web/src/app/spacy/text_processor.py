@@ -2,20 +2,82 @@
 ## \brief Processes multilingual texts by detecting language and extracting named entities using spaCy.
 
 
-import spacy
+import heapq
+import itertools
 import json
 import os
+import tempfile
+import textwrap
+import threading
 from langdetect import detect
 from loguru import logger
-from app.utils.utils import get_connection_parameters,create_config_file
-from app.models.opensearh_db import store_in_opensearch,text_exists_in_opensearch,ensure_index_exists
-
-# Load spaCy models by language (Spanish, English, and French)
-models = {
-    'es': spacy.load("es_core_news_sm"),
-    'en': spacy.load("en_core_web_sm"),
-    'fr': spacy.load("fr_core_news_sm"),
+from app.models.opensearh_db import OpenSearchBulkWriter,texts_existing_in_opensearch,ensure_index_exists,load_opensearch_parameters
+from app.spacy.checkpoint import checkpoint_path_for,load_checkpoint,save_checkpoint,resume_cursor
+from app.utils.jsonl_store import iter_records
+
+# spaCy models available by language (Spanish, English, and French)
+MODEL_NAMES: dict[str, str] = {
+    'es': "es_core_news_sm",
+    'en': "en_core_web_sm",
+    'fr': "fr_core_news_sm",
 }
+# Language used when the detected one has no model
+DEFAULT_LANGUAGE: str = 'es'
+# Languages loaded at application startup instead of on first use
+PRELOADED_LANGUAGES: list[str] = []
+# Pipeline components not needed for named entity recognition
+EXCLUDED_PIPES: list[str] = [
+    "tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"
+]
+
+# Pipelines loaded so far, filled on demand by get_model()
+models: dict = {}
+_models_lock = threading.Lock()
+
+# Number of texts handed to spaCy per batch by nlp.pipe
+BATCH_SIZE: int = 256
+# Worker processes used by nlp.pipe (-1 uses every available core)
+N_PROCESS: int = 1
+# Distinct texts labeled, indexed and written to a sorted run at a time
+LABEL_CHUNK_SIZE: int = 5000
+
+def get_model(language):
+    '''
+    @brief Returns the spaCy pipeline for a language, loading it the first time it is needed.
+    @details Only the components required by NER are loaded. The shared tok2vec is dropped
+    as well when the NER component does not listen to it.
+    @param language ISO 639-1 language code.
+    @return Loaded spaCy pipeline (the default language one if the language is not supported).
+    '''
+    if language not in MODEL_NAMES:
+        language = DEFAULT_LANGUAGE
+
+    model = models.get(language)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        if language not in models:
+            # Imported here so that importing this module stays cheap
+            import spacy
+
+            logger.info(f"Loading spaCy model '{MODEL_NAMES[language]}'...")
+            model = spacy.load(MODEL_NAMES[language], exclude=EXCLUDED_PIPES)
+            if "tok2vec" in model.pipe_names:
+                listeners = model.get_pipe("tok2vec").listening_components
+                if "ner" not in listeners:
+                    model.remove_pipe("tok2vec")
+            models[language] = model
+            logger.info(f"spaCy model '{MODEL_NAMES[language]}' loaded with pipes {model.pipe_names}")
+        return models[language]
+
+def preload_models(languages=None):
+    '''
+    @brief Loads the pipelines of the pinned languages ahead of their first use.
+    @param languages Languages to load. Defaults to PRELOADED_LANGUAGES.
+    '''
+    for language in (PRELOADED_LANGUAGES if languages is None else languages):
+        get_model(language)
 
 def detect_language(text):
     '''
@@ -35,10 +97,41 @@ def tag_text(text):
     @return A tuple with the list of found entities [(text, type)] and the detected language.
     '''
     language = detect_language(text)
-    model = models.get(language, models['es'])  # Use Spanish model if language is not supported
+    model = get_model(language)  # Use Spanish model if language is not supported
     doc = model(text)
     return [(ent.text, ent.label_) for ent in doc.ents], language
 
+def tag_texts(texts, batch_size=BATCH_SIZE, n_process=N_PROCESS):
+    '''
+    @brief Tags named entities in many texts at once using batched spaCy pipelines.
+    @details Texts are grouped by the model that handles their detected language and
+    each group is streamed through nlp.pipe, so the model works on batches instead
+    of one string at a time.
+    @param texts List of texts to process.
+    @param batch_size Number of texts sent to spaCy per batch.
+    @param n_process Number of worker processes used by nlp.pipe (-1 for all cores).
+    @return List of (entities, language) tuples in the same order as the input texts.
+    '''
+    results = [None] * len(texts)
+    languages = [detect_language(text) for text in texts]
+
+    # Group text positions by the model that will process them
+    groups: dict[str, list[int]] = {}
+    for index, language in enumerate(languages):
+        model_key = language if language in MODEL_NAMES else DEFAULT_LANGUAGE
+        groups.setdefault(model_key, []).append(index)
+
+    for model_key, indices in groups.items():
+        docs = get_model(model_key).pipe(
+            (texts[i] for i in indices),
+            batch_size=batch_size,
+            n_process=n_process
+        )
+        for index, doc in zip(indices, docs):
+            results[index] = ([(ent.text, ent.label_) for ent in doc.ents], languages[index])
+
+    return results
+
 def extract_texts(data):
     '''
     @brief Extracts relevant text strings from the input JSON data.
@@ -58,91 +151,173 @@ def extract_texts(data):
 
     return texts
 
-def process_json(input_path, output_path):
+def label_batch(texts, parameters, writer, batch_size=BATCH_SIZE, n_process=N_PROCESS):
     '''
-    @brief Processes an input JSON file, tagging texts by language, and saves the results to another JSON.
-    @param input_path Path to the input JSON file.
-    @param output_path Path where the result JSON file will be saved.
-    @return List of results with text, language, tags, and relevance (number of tags).
+    @brief Labels a batch of texts that are not indexed yet and queues them for indexing.
+    @param texts List of distinct candidate texts.
+    @param parameters OpenSearch connection parameters (host, port).
+    @param writer OpenSearchBulkWriter used to store the labeled documents.
+    @param batch_size Number of texts sent to spaCy per batch.
+    @param n_process Number of worker processes used by spaCy (-1 for all cores).
+    @return List of labeled documents sorted by relevance in descending order.
     '''
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    # Skip texts already indexed, looked up in bulk
+    indexed_texts = texts_existing_in_opensearch(
+        texts, parameters[0], parameters[1], "spacy_documents"
+    )
+    if indexed_texts:
+        logger.info(f"{len(indexed_texts)} texts already indexed, skipping them.")
+        texts = [text for text in texts if text not in indexed_texts]
 
-    # The input data can be either a dict or a list of dicts; normalize to a list
-    records = data if isinstance(data, list) else [data]
+    docs = []
+    for text, (tags, detected_language) in zip(texts, tag_texts(texts, batch_size, n_process)):
+        doc = {
+            "text": text,
+            "language": detected_language,
+            "tags": tags,
+            "relevance": len(tags)
+        }
+        writer.add(doc)
+        docs.append(doc)
 
-    results: list[dict] = []
+    # Make the batch visible to the lookup of the next one
+    writer.flush()
 
-    # Default OpenSearch connection parameters (will be overridden if cfg.ini exists)
-    parameters: tuple = (
-        'localhost',
-        9200
-    )
-    file_name: str = 'cfg.ini'
-    file_content: list[str] = [
-        '# Configuration file.\n',
-        '# This file contains the parameters for connecting to the OpenSearch database server.\n',
-        '# ONLY one uncommented line is allowed.\n',
-        '# The valid line format is: server_ip;server_port\n',
-        f'{parameters[0]};{parameters[1]}\n'
-    ]
-
-    # Get connection parameters or recreate configuration file if needed
-    retorno_otros = get_connection_parameters(file_name)
-    logger.info(retorno_otros[1])
-
-    if retorno_otros[0] != 0:
-        logger.info('Recreating configuration file...')
-        retorno_otros = create_config_file(file_name, file_content)
-        logger.info(retorno_otros[1])
-
-        if retorno_otros[0] != 0:
-            logger.error('Configuration file missing. Execution cannot continue without a configuration file.')
-            return
-    else:
-        parameters = retorno_otros[2]  # Parameters read from the config file
+    docs.sort(key=lambda x: x["relevance"], reverse=True)
+    return docs
 
+def write_sorted_run(docs, run_dir, run_number):
+    '''
+    @brief Writes a batch of documents already sorted by relevance to a temporary run file.
+    @param docs Documents sorted by relevance in descending order.
+    @param run_dir Directory holding the run files.
+    @param run_number Sequence number of the run.
+    @return Path of the run file.
+    '''
+    run_path = os.path.join(run_dir, f"run_{run_number:06d}.jsonl")
+    with open(run_path, "w", encoding="utf-8") as f:
+        for doc in docs:
+            f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+    return run_path
 
-    # Local set to avoid duplicate texts within the same execution
-    processed_texts: set[str] = set()
+def read_run(run_path):
+    '''
+    @brief Streams the documents of a run file.
+    @param run_path Path of the run file.
+    @return Generator of documents.
+    '''
+    with open(run_path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+def merge_runs(run_paths, output_path, top_k=None):
+    '''
+    @brief Merges sorted run files into the output JSON array, most relevant first.
+    @details Only one document per run is held in memory. Documents with the same
+    relevance keep the order in which they were labeled.
+    @param run_paths Paths of the run files, in labeling order.
+    @param output_path Path where the result JSON file will be saved.
+    @param top_k If set, only the top_k most relevant documents are written.
+    @return Number of documents written.
+    '''
+    merged = heapq.merge(*(read_run(path) for path in run_paths), key=lambda x: -x["relevance"])
+    if top_k is not None:
+        merged = itertools.islice(merged, top_k)
+
+    written = 0
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for doc in merged:
+            f.write(",\n" if written else "\n")
+            f.write(textwrap.indent(json.dumps(doc, ensure_ascii=False, indent=4), "    "))
+            written += 1
+        f.write("\n]" if written else "]")
+    os.replace(tmp_path, output_path)
+    return written
+
+def process_json(input_path, output_path, batch_size=BATCH_SIZE, n_process=N_PROCESS, incremental=True,
+                 chunk_size=LABEL_CHUNK_SIZE, top_k=None):
+    '''
+    @brief Processes an input JSON Lines store, tagging texts by language, and saves the results to a JSON file.
+    @details Records are streamed from the store and labeled in chunks of texts, so memory use
+    does not depend on the size of the input. Each labeled chunk is indexed in OpenSearch and
+    written, sorted by relevance, to a temporary run file; the runs are then merged into the
+    output file (external merge sort).
+    In incremental mode only the records appended since the last successful run are labeled;
+    a run in which some documents could not be indexed for a transient reason (connection
+    errors, throttling or server errors after the retries) does not move the checkpoint.
+    Documents rejected by OpenSearch for good (e.g. a mapping error) are only logged by the
+    writer: labeling them again would fail the same way.
+    The position reached is persisted next to the input file together with a hash of the
+    bytes preceding it, so a rewritten or truncated store is detected and processed again
+    from the beginning.
+    @param input_path Path to the input JSON Lines store.
+    @param output_path Path where the result JSON file will be saved.
+    @param batch_size Number of texts sent to spaCy per batch.
+    @param n_process Number of worker processes used by spaCy (-1 for all cores).
+    @param incremental If True, skip the records covered by the stored checkpoint.
+    @param chunk_size Number of distinct texts labeled and indexed together.
+    @param top_k If set, only the top_k most relevant documents are written to the output file.
+    @return Number of documents labeled in this run, or None if it could not start.
+    '''
+    checkpoint_path = checkpoint_path_for(input_path)
+    checkpoint = load_checkpoint(checkpoint_path) if incremental else None
+    cursor = resume_cursor(input_path, checkpoint)
+    logger.info(f"Reading {input_path} from segment {cursor[0]}, byte {cursor[1]}.")
+
+    # OpenSearch connection parameters (cfg.ini, recreated with defaults if needed)
+    parameters = load_opensearch_parameters()
+    if parameters is None:
+        return
 
     #Ensure the index exists in OpenSearch
     ensure_index_exists(parameters[0], parameters[1], "spacy_documents")
 
-    for record in records:
-        texts = extract_texts(record)
-        for text in texts:
-            if not text.strip():
-                continue
+    new_records = 0
+    labeled = 0
+    run_paths: list[str] = []
+    # Distinct texts of the current chunk; duplicates across chunks are caught by the index lookup
+    chunk: dict[str, None] = {}
 
-            # Skip duplicates inside the same run
-            if text in processed_texts:
-                continue
+    with tempfile.TemporaryDirectory(prefix="labels_runs_") as run_dir, \
+            OpenSearchBulkWriter(parameters[0], parameters[1], "spacy_documents", op_type="create") as writer:
 
-            if text_exists_in_opensearch(text, parameters[0], parameters[1], "spacy_documents"):
-                logger.info(f"Text already indexed, skipping: {text[:80]}...")
-                continue
+        def flush_chunk():
+            docs = label_batch(list(chunk), parameters, writer, batch_size, n_process)
+            chunk.clear()
+            if docs:
+                run_paths.append(write_sorted_run(docs, run_dir, len(run_paths)))
+            return len(docs)
 
-            processed_texts.add(text)
+        for record, cursor in iter_records(input_path, cursor):
+            new_records += 1
+            for text in extract_texts(record):
+                if text.strip():
+                    chunk[text] = None
+            if len(chunk) >= chunk_size:
+                labeled += flush_chunk()
 
-            tags, detected_language = tag_text(text)
-            doc = {
-                "text": text,
-                "language": detected_language,
-                "tags": tags,
-                "relevance": len(tags)
-            }
-            results.append(doc)
+        if chunk:
+            labeled += flush_chunk()
 
-    # Sort results by number of named entities (relevance) in descending order
-    results.sort(key=lambda x: x["relevance"], reverse=True)
+        logger.info(f"{new_records} new records processed, {labeled} texts labeled.")
 
-    # Save results to the output JSON file
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=4)
+        # Save results sorted by relevance to the output JSON file
+        merge_runs(run_paths, output_path, top_k)
 
-    # Store each new document in OpenSearch
-    for doc in results:
-        store_in_opensearch(doc, parameters[0], parameters[1], "spacy_documents")
+    # Remember how far the input file has been processed, unless some documents
+    # could not be indexed for a transient reason: the next run labels them again
+    # (the ones already stored are skipped by the index lookup and the "create"
+    # operations). Permanently rejected documents do not hold the checkpoint back.
+    if writer.rejected:
+        logger.warning(f"{writer.rejected} documents rejected by OpenSearch were not stored.")
+    if writer.failed:
+        logger.warning(
+            f"{writer.failed} documents could not be indexed; checkpoint not saved, "
+            f"the records will be processed again on the next run."
+        )
+    else:
+        save_checkpoint(checkpoint_path, input_path, cursor)
 
-    return results
+    return labeled
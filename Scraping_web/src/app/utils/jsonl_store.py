@@ -0,0 +1,369 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 11:40:03
+# @ Project: Cebolla
+# @ Description: Append-only JSON Lines store for the scraped output.
+#
+# Every collector (Scrapy spiders, Google dork news search) appends its
+# records to the same store, one JSON object per line, so an append costs
+# the same whatever the size of the file. The store can optionally be split
+# into segments: `result.jsonl` is segment 0, followed by `result.1.jsonl`,
+# `result.2.jsonl`, ... A new segment is started once the last one reaches
+# the configured size. Segments are never renamed, so a reader position
+# (segment, byte offset) stays valid while writers keep appending.
+#
+# Writers from several processes are serialized with an advisory file lock
+# (`filelock`). Alternatively, `OutputWriter` runs a single writer process
+# fed by a multiprocessing queue, so spiders only enqueue their items and
+# the lock is taken once per batch of records. Lock wait time and
+# contention are tracked in `LockMetrics`.
+
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from filelock import FileLock, Timeout
+from loguru import logger
+
+# Default location of the scraped output
+OUTPUT_FILE = "./outputs/result.jsonl"
+# Former single JSON array output, converted by migrate_json_array()
+LEGACY_OUTPUT_FILE = "./outputs/result.json"
+
+# Position inside the store: (segment index, byte offset inside the segment)
+Cursor = Tuple[int, int]
+
+# Seconds a writer waits for the store lock before giving up
+LOCK_TIMEOUT = 30
+# Maximum records written by the writer process under one lock acquisition
+WRITER_BATCH_SIZE = 500
+
+# Last segment index seen per store path, to avoid probing from 0 every time
+_active_segments: Dict[str, int] = {}
+
+
+class LockMetrics:
+    '''
+    @brief Counters about the store lock: acquisitions, contention and wait time.
+
+    When created with `shared=True` the counters live in shared memory, so
+    they can be updated by a child process and read by its parent.
+    '''
+
+    FIELDS = ("acquisitions", "contended", "wait_total", "wait_max", "records")
+
+    def __init__(self, shared: bool = False):
+        if shared:
+            self._values = multiprocessing.Array("d", len(self.FIELDS))
+        else:
+            self._values = [0.0] * len(self.FIELDS)
+
+    def record(self, wait: float, contended: bool, records: int) -> None:
+        '''
+        @brief Registers one lock acquisition.
+
+        @param wait: Seconds spent waiting for the lock.
+        @param contended: True if the lock was held by another writer.
+        @param records: Number of records written while holding the lock.
+        '''
+        self._values[0] += 1
+        self._values[1] += 1 if contended else 0
+        self._values[2] += wait
+        self._values[3] = max(self._values[3], wait)
+        self._values[4] += records
+
+    def snapshot(self) -> Dict[str, float]:
+        '''
+        @brief Returns the current value of the counters.
+
+        @return: Dictionary with the counters and the average wait.
+        '''
+        values = dict(zip(self.FIELDS, list(self._values)))
+        acquisitions = values["acquisitions"] or 1
+        values["wait_avg"] = values["wait_total"] / acquisitions
+        return values
+
+
+# Lock metrics of the writers running in this process
+lock_metrics = LockMetrics()
+
+
+def segment_path(path: str, index: int) -> str:
+    '''
+    @brief Builds the file path of a segment of the store.
+
+    @param path: Path of the store (segment 0).
+    @param index: Segment index.
+    @return: Path of the segment file.
+    '''
+    if index == 0:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{index}{ext}"
+
+
+def _last_segment(path: str) -> int:
+    index = _active_segments.get(path, 0)
+    # Other processes may have started new segments since the last append
+    while os.path.exists(segment_path(path, index + 1)):
+        index += 1
+    _active_segments[path] = index
+    return index
+
+
+def append_records(
+    records: Iterable[Dict[str, Any]],
+    path: str = OUTPUT_FILE,
+    max_segment_bytes: Optional[int] = None,
+    metrics: Optional[LockMetrics] = None,
+) -> None:
+    '''
+    @brief Appends several records to the store under one lock acquisition.
+
+    The lines are written with one write call on a file opened in append
+    mode, so the cost does not depend on the size of the store.
+
+    @param records: JSON-serializable dictionaries.
+    @param path: Path of the store.
+    @param max_segment_bytes: If set, start a new segment once the last one
+    reaches this size.
+    @param metrics: Where to record the lock statistics (defaults to the
+    metrics of this process).
+    '''
+    lines = [
+        json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        for record in records
+    ]
+    if not lines:
+        return
+    data = "".join(lines).encode("utf-8")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    lock = FileLock(f"{path}.lock")
+    start = time.perf_counter()
+    try:
+        lock.acquire(timeout=0)
+        contended = False
+    except Timeout:
+        contended = True
+        lock.acquire(timeout=LOCK_TIMEOUT)
+    (metrics or lock_metrics).record(time.perf_counter() - start, contended, len(lines))
+
+    try:
+        index = _last_segment(path)
+        target = segment_path(path, index)
+        if (
+            max_segment_bytes
+            and os.path.exists(target)
+            and os.path.getsize(target) >= max_segment_bytes
+        ):
+            index += 1
+            _active_segments[path] = index
+            target = segment_path(path, index)
+
+        with open(target, "ab") as f:
+            f.write(data)
+    finally:
+        lock.release()
+
+
+def append_record(
+    record: Dict[str, Any],
+    path: str = OUTPUT_FILE,
+    max_segment_bytes: Optional[int] = None,
+) -> None:
+    '''
+    @brief Appends one record to the store as a single JSON line.
+
+    @param record: JSON-serializable dictionary.
+    @param path: Path of the store.
+    @param max_segment_bytes: If set, start a new segment once the last one
+    reaches this size.
+    '''
+    append_records([record], path, max_segment_bytes)
+
+
+def _writer_loop(
+    records_queue,
+    path: str,
+    max_segment_bytes: Optional[int],
+    metrics: LockMetrics,
+) -> None:
+    stopping = False
+    while not stopping:
+        record = records_queue.get()
+        if record is None:
+            break
+        batch: List[Dict[str, Any]] = [record]
+
+        # Take whatever else is already queued, up to one batch
+        while len(batch) < WRITER_BATCH_SIZE:
+            try:
+                record = records_queue.get_nowait()
+            except queue_module.Empty:
+                break
+            if record is None:
+                stopping = True
+                break
+            batch.append(record)
+
+        try:
+            append_records(batch, path, max_segment_bytes, metrics)
+        except Exception as e:
+            logger.error(f"Output writer failed to write {len(batch)} records: {e}")
+
+
+class OutputWriter:
+    '''
+    @brief Single writer process that appends the records sent to its queue.
+
+    Spider processes receive `writer.queue` and put their items on it
+    instead of taking the store lock themselves.
+    '''
+
+    def __init__(self, path: str = OUTPUT_FILE, max_segment_bytes: Optional[int] = None):
+        '''
+        @param path: Path of the store.
+        @param max_segment_bytes: If set, start a new segment once the last
+        one reaches this size.
+        '''
+        self.path = path
+        self.max_segment_bytes = max_segment_bytes
+        self.queue = multiprocessing.Queue()
+        self.lock_metrics = LockMetrics(shared=True)
+        self._process: Optional[multiprocessing.Process] = None
+
+    def start(self) -> None:
+        '''
+        @brief Starts the writer process.
+        '''
+        self._process = multiprocessing.Process(
+            target=_writer_loop,
+            args=(self.queue, self.path, self.max_segment_bytes, self.lock_metrics),
+            daemon=True,
+        )
+        self._process.start()
+        logger.info(f"Output writer process started for {self.path}")
+
+    def put(self, record: Dict[str, Any]) -> None:
+        '''
+        @brief Sends a record to the writer process.
+
+        @param record: JSON-serializable dictionary.
+        '''
+        self.queue.put(record)
+
+    def stop(self, timeout: float = 10) -> None:
+        '''
+        @brief Writes the queued records and stops the writer process.
+
+        @param timeout: Seconds to wait for the process to finish.
+        '''
+        if self._process is None:
+            return
+        self.queue.put(None)
+        self._process.join(timeout)
+        logger.info(f"Output writer stopped. Lock metrics: {self.lock_metrics.snapshot()}")
+        self._process = None
+
+    def metrics(self) -> Dict[str, Any]:
+        '''
+        @brief Returns the writer statistics.
+
+        @return: Lock metrics of the writer process plus its queue backlog.
+        '''
+        values: Dict[str, Any] = self.lock_metrics.snapshot()
+        try:
+            values["queued"] = self.queue.qsize()
+        except NotImplementedError:
+            # qsize() is not available on every platform (e.g. macOS)
+            values["queued"] = None
+        values["alive"] = bool(self._process and self._process.is_alive())
+        return values
+
+
+def iter_records(
+    path: str = OUTPUT_FILE,
+    start: Cursor = (0, 0),
+) -> Iterator[Tuple[Dict[str, Any], Cursor]]:
+    '''
+    @brief Streams the records of the store from a given position.
+
+    Only one line is held in memory at a time. A trailing line without its
+    newline (a write still in progress) is left for the next read.
+
+    @param path: Path of the store.
+    @param start: Cursor to start reading from.
+    @return: Iterator of (record, cursor just after the record).
+    '''
+    index, offset = start
+    while os.path.exists(segment_path(path, index)):
+        with open(segment_path(path, index), "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping malformed line in {segment_path(path, index)} at byte {offset - len(line)}")
+                    continue
+                yield record, (index, offset)
+
+        if not os.path.exists(segment_path(path, index + 1)):
+            break
+        index, offset = index + 1, 0
+
+
+def store_exists(path: str = OUTPUT_FILE) -> bool:
+    '''
+    @brief Checks whether the store has been created.
+
+    @param path: Path of the store.
+    @return: True if the first segment exists.
+    '''
+    return os.path.exists(path)
+
+
+def migrate_json_array(
+    legacy_path: str = LEGACY_OUTPUT_FILE,
+    path: str = OUTPUT_FILE,
+) -> int:
+    '''
+    @brief Converts the former JSON array output into the JSON Lines store.
+
+    Only runs when the store does not exist yet. The legacy file is kept and
+    renamed with a `.migrated` suffix.
+
+    @param legacy_path: Path of the JSON array file.
+    @param path: Path of the store.
+    @return: Number of migrated records.
+    '''
+    if store_exists(path) or not os.path.exists(legacy_path):
+        return 0
+
+    try:
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError as e:
+        logger.error(f"Cannot migrate {legacy_path}, invalid JSON: {e}")
+        return 0
+
+    records = data if isinstance(data, list) else [data]
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+    os.replace(tmp_path, path)
+    os.replace(legacy_path, f"{legacy_path}.migrated")
+
+    logger.info(f"Migrated {len(records)} records from {legacy_path} to {path}")
+    return len(records)
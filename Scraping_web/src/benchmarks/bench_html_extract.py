@@ -0,0 +1,105 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 14:52:09
+# @ Project: Cebolla
+# @ Description: Benchmark of the page structure extraction: the previous
+# per-tag CSS queries of DynamicSpider.parse and the previous BeautifulSoup
+# parsing of news_gd against the single-pass `extract_structure`.
+#
+# Run from Scraping_web/src with a directory of saved HTML pages:
+#   python -m benchmarks.bench_html_extract ./data/html_fixtures
+# Without a directory a synthetic article is used.
+
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from parsel import Selector
+
+from app.scraping.html_extract import extract_structure, parse_html
+
+TAGS = ["h1", "h2", "h3", "h4", "h5", "h6", "p"]
+REPEAT = 20
+
+
+def synthetic_page() -> str:
+    '''
+    @brief Builds an article-like page with headers, paragraphs and markup noise.
+    @return HTML source.
+    '''
+    sections = []
+    for i in range(40):
+        sections.append(
+            f"<h2>Section {i}</h2>"
+            + "".join(
+                f"<p>Paragraph {i}.{j} about a <a href='#'>ransomware</a> campaign "
+                f"targeting <b>industrial</b> control systems.</p>"
+                for j in range(8)
+            )
+            + "<div class='ad'><span>advert</span><ul><li>x</li><li>y</li></ul></div>"
+        )
+    return (
+        "<html><head><title>Synthetic article</title><script>var a = 1;</script></head>"
+        "<body><nav><ul>" + "<li><a href='#'>menu</a></li>" * 50 + "</ul></nav>"
+        "<h1>Headline</h1>" + "".join(sections) + "</body></html>"
+    )
+
+
+def load_pages(directory: str | None) -> list[str]:
+    '''
+    @brief Loads the HTML fixtures of a directory.
+    @param directory Directory with .html files, or None.
+    @return List of HTML sources.
+    '''
+    if not directory:
+        return [synthetic_page()]
+    return [
+        path.read_text(encoding="utf-8", errors="replace")
+        for path in sorted(Path(directory).glob("*.html"))
+    ]
+
+
+def spider_css_queries(selector: Selector) -> dict:
+    data = {"title": selector.css("title::text").get(default="Untitled")}
+    full_text = data["title"].lower()
+    for tag in TAGS:
+        elements = selector.css(f"{tag}::text").getall()
+        clean_elements = [e.strip() for e in elements if e.strip()]
+        data[tag] = clean_elements
+        full_text += " " + " ".join(clean_elements).lower()
+    return data
+
+
+def news_beautifulsoup(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+    news = {"title": soup.title.string.strip() if soup.title else ""}
+    for tag in TAGS:
+        news[tag] = [e.get_text(strip=True) for e in soup.find_all(tag)]
+    return news
+
+
+def main() -> None:
+    '''
+    @brief Prints the milliseconds per page of each strategy.
+    '''
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not pages:
+        print("No HTML fixtures found.")
+        return
+    selectors = [Selector(text=html) for html in pages]
+
+    cases = {
+        "spider: css queries (pre-parsed)": lambda: [spider_css_queries(s) for s in selectors],
+        "spider: single pass (pre-parsed)": lambda: [extract_structure(s.root, "") for s in selectors],
+        "news: BeautifulSoup html.parser": lambda: [news_beautifulsoup(html) for html in pages],
+        "news: lxml parse + single pass": lambda: [extract_structure(parse_html(html), "") for html in pages],
+    }
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) // len(pages)} chars on average")
+    for label, func in cases.items():
+        elapsed = timeit.timeit(func, number=REPEAT)
+        print(f"{label:<36} {elapsed / REPEAT / len(pages) * 1000:8.3f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 13:20:37
+# @ Project: Cebolla
+# @ Description: Microbenchmark of the keyword relevance check: one
+# substring scan per keyword (previous behaviour) against the compiled
+# `KeywordMatcher`, over synthetic pages of realistic sizes.
+#
+# Run from Scraping_web/src:
+#   python -m benchmarks.bench_keyword_matcher
+
+import random
+import timeit
+
+from app.scraping.keyword_matcher import KeywordMatcher
+from app.scraping.spider_factory import CYBERSECURITY_KEYWORDS
+
+# Typical article sizes in characters (short news, long article, full page)
+PAGE_SIZES = [5_000, 30_000, 150_000]
+REPEAT = 200
+
+FILLER_WORDS = (
+    "the company said on monday that its network was affected by an incident "
+    "la empresa informó que sus sistemas industriales fueron afectados durante "
+    "el fin de semana according to researchers the campaign targeted energy"
+).split()
+
+
+def make_page(size: int, keyword_ratio: float = 0.002) -> str:
+    '''
+    @brief Builds a synthetic page with a few keywords among filler words.
+    @param size Approximate size of the page in characters.
+    @param keyword_ratio Probability of a word being a keyword.
+    @return Page text.
+    '''
+    rng = random.Random(size)
+    words = []
+    length = 0
+    while length < size:
+        if rng.random() < keyword_ratio:
+            word = rng.choice(CYBERSECURITY_KEYWORDS)
+        else:
+            word = rng.choice(FILLER_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def substring_scan(text: str) -> bool:
+    full_text = text.lower()
+    return any(keyword in full_text for keyword in CYBERSECURITY_KEYWORDS)
+
+
+def main() -> None:
+    '''
+    @brief Prints the time per page of both strategies for each page size.
+    '''
+    matcher = KeywordMatcher(CYBERSECURITY_KEYWORDS)
+
+    print(f"{'chars':>8} {'substring any()':>16} {'matcher.matches':>16} {'matcher.counts':>16}")
+    for size in PAGE_SIZES:
+        # Worst case for any(): no keyword at all, every keyword is scanned
+        for label, page in (("hit", make_page(size)), ("miss", make_page(size, 0.0))):
+            per_page = []
+            for func in (substring_scan, matcher.matches, matcher.counts):
+                elapsed = timeit.timeit(lambda: func(page), number=REPEAT)
+                per_page.append(elapsed / REPEAT * 1e6)
+            print(f"{size:>8} {per_page[0]:>13.1f} us {per_page[1]:>13.1f} us "
+                  f"{per_page[2]:>13.1f} us  ({label})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 15:20:44
+# @ Project: Cebolla
+# @ Description: Parity check and throughput benchmark of the HTML parser
+# backends of `app.scraping.html_extract.extract_page`.
+#
+# Every captured page is first extracted with every backend and the
+# resulting dictionaries are compared with the "bs4" reference (the former
+# news_gd parser); differences are listed. Then the throughput of each
+# backend is measured. The exit code is 1 if any page differs.
+#
+# Run from Scraping_web/src with a directory of captured HTML pages:
+#   python -m benchmarks.bench_parser_backends ./data/html_fixtures
+
+import sys
+import timeit
+
+from app.scraping.html_extract import PARSER_BACKENDS, extract_page
+from benchmarks.bench_html_extract import load_pages
+
+REFERENCE_BACKEND = "bs4"
+REPEAT = 10
+
+
+def diff_pages(reference: dict, other: dict) -> list[str]:
+    '''
+    @brief Lists the fields that differ between two extracted pages.
+    @param reference Page extracted by the reference backend.
+    @param other Page extracted by another backend.
+    @return Human-readable differences (empty if both are equal).
+    '''
+    differences = []
+    for key in sorted(set(reference) | set(other)):
+        if reference.get(key) != other.get(key):
+            differences.append(f"{key}: {reference.get(key)!r:.80} != {other.get(key)!r:.80}")
+    return differences
+
+
+def main() -> int:
+    '''
+    @brief Runs the parity check and the benchmark.
+    @return Process exit code.
+    '''
+    pages = load_pages(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not pages:
+        print("No HTML fixtures found.")
+        return 1
+
+    mismatches = 0
+    for number, html in enumerate(pages):
+        reference = extract_page(html, "", backend=REFERENCE_BACKEND)
+        for backend in PARSER_BACKENDS:
+            if backend == REFERENCE_BACKEND:
+                continue
+            differences = diff_pages(reference, extract_page(html, "", backend=backend))
+            if differences:
+                mismatches += 1
+                print(f"[page {number}] {backend} differs from {REFERENCE_BACKEND}:")
+                for difference in differences:
+                    print(f"    {difference}")
+    print(f"Parity: {len(pages)} pages, {mismatches} mismatches\n")
+
+    total_bytes = sum(len(html.encode("utf-8")) for html in pages)
+    for backend in PARSER_BACKENDS:
+        elapsed = timeit.timeit(
+            lambda: [extract_page(html, "", backend=backend) for html in pages],
+            number=REPEAT,
+        )
+        pages_per_sec = len(pages) * REPEAT / elapsed
+        mb_per_sec = total_bytes * REPEAT / elapsed / 1e6
+        print(f"{backend:<8} {pages_per_sec:10.1f} pages/s {mb_per_sec:8.2f} MB/s")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-17 10:05:12
+# @ Project: Cebolla
+# @ Description: Benchmark comparing the per-text spaCy labeling loop
+# (`tag_text`) against the batched engine (`tag_texts`).
+#
+# Run from Scraping_web/src:
+#   python -m benchmarks.bench_text_processor ./outputs/result.jsonl 5000
+
+import sys
+import time
+
+from app.spacy.text_processor import extract_texts, tag_text, tag_texts
+from app.utils.jsonl_store import iter_records
+
+
+def load_sample(input_path: str, limit: int) -> list[str]:
+    '''
+    @brief Loads up to `limit` non-empty texts from the scraped result store.
+    @param input_path Path to the scraped JSON Lines store.
+    @param limit Maximum number of texts to return.
+    @return List of texts.
+    '''
+    texts: list[str] = []
+    for record, _ in iter_records(input_path):
+        for text in extract_texts(record):
+            if text.strip():
+                texts.append(text)
+                if len(texts) >= limit:
+                    return texts
+    return texts
+
+
+def main() -> None:
+    '''
+    @brief Times both labeling strategies and prints documents per second.
+    '''
+    input_path = sys.argv[1] if len(sys.argv) > 1 else "./outputs/result.jsonl"
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    n_process = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    texts = load_sample(input_path, limit)
+    if not texts:
+        print("No texts found to benchmark.")
+        return
+
+    start = time.perf_counter()
+    for text in texts:
+        tag_text(text)
+    loop_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tag_texts(texts, n_process=n_process)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"Texts:              {len(texts)}")
+    print(f"Per-text loop:      {len(texts) / loop_elapsed:10.1f} docs/sec")
+    print(f"Batched (n_proc={n_process}): {len(texts) / batch_elapsed:10.1f} docs/sec")
+    print(f"Speed-up:           {loop_elapsed / batch_elapsed:10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,13 @@ from app.controllers.routes.tiny_postgres_controller import (
 from app.controllers.routes.spacy_controller import (
     background_process_every_24h,
 )
+from app.spacy.text_processor import PRELOADED_LANGUAGES, preload_models
+from app.scraping.http_client import close_http_client, get_http_client
+from app.utils.jsonl_store import OutputWriter, migrate_json_array
+from app.models.url_index import bootstrap_url_index
+from app.scraping.spider_factory import create_dynamic_spider
+from app.scraping.spider_pool import SpiderPool
+from app.scraping.crawler_service import stop_crawler_service
 
 
 @asynccontextmanager
@@ -49,14 +56,23 @@ async def lifespan(app: FastAPI):
 
     @details On startup, it:
     - Connects to PostgreSQL
+    - Creates the shared pooled HTTP client
+    - Migrates the former result.json array to the result.jsonl store
+    - Fills the persistent seen-URL index from the existing outputs
     - Starts Google Alerts recurring scraping
     - Starts RSS feed extraction
     - Starts immediate scraping for feeds and news
+    - Preloads the pinned spaCy models in the background
+    - Starts the output writer process fed by the spiders
+    - Creates the spider worker pool
     - Starts NLP labeling with spaCy every 24 hours
     - Starts dynamic Scrapy spider from PostgreSQL config
 
     On shutdown, it:
     - Closes the PostgreSQL connection pool
+    - Closes the shared HTTP client
+    - Stops the spider pool workers and the shared crawler service
+    - Stops the output writer process after writing its queued items
     """
     loop = asyncio.get_running_loop()
     logger.info("[Lifespan] Starting background tasks...")
@@ -79,15 +95,26 @@ async def lifespan(app: FastAPI):
         logger.exception("[Startup] Failed to connect to PostgreSQL.")
         pool = None
 
+    # Shared HTTP client of the collectors running in this event loop
+    app.state.http_client = get_http_client()
+
     # Required paths
     google_alerts_path = "./data/google_alert_rss.txt"
     urls_path = "./data/urls_cybersecurity_ot_it.txt"
-    input_path = "./outputs/result.json"
+    input_path = "./outputs/result.jsonl"
     output_path = "./outputs/labels_result.json"
 
+    # Convert the former JSON array output into the JSON Lines store
+    migrate_json_array()
+
+    # Seen-URL index, filled from the existing outputs on first start (before
+    # any collector adds URLs to it)
+    bootstrap_url_index()
+
     # Google Alerts scraper
     if os.path.exists(google_alerts_path):
         threading.Thread(
+            target=recurring_google_alert_scraper,
             args=(loop,),
             daemon=True,
         ).start()
@@ -119,6 +146,20 @@ async def lifespan(app: FastAPI):
     ).start()
     logger.info("[Startup] Feed and news scraping launched.")
 
+    # spaCy models pinned for preloading (the rest load on first use)
+    if PRELOADED_LANGUAGES:
+        threading.Thread(target=preload_models, daemon=True).start()
+        logger.info(f"[Startup] Preloading spaCy models: {PRELOADED_LANGUAGES}")
+
+    # Single writer process for the items scraped by the spiders
+    output_writer = OutputWriter()
+    output_writer.start()
+    app.state.output_writer = output_writer
+
+    # Supervised pool of long-lived crawler processes fed from the crawl queue
+    spider_pool = SpiderPool(create_dynamic_spider, output_queue=output_writer.queue)
+    app.state.spider_pool = spider_pool
+
     # NLP processing (spaCy)
     if os.path.exists(input_path):
         threading.Thread(
@@ -128,11 +169,13 @@ async def lifespan(app: FastAPI):
         ).start()
         logger.info("[Startup] spaCy NLP labeling scheduled every 24h.")
     else:
-        logger.warning("[Startup] result.json not found. NLP not launched.")
+        logger.warning("[Startup] result.jsonl not found. NLP not launched.")
 
     # Dynamic Scrapy spider from DB
     if pool:
-        asyncio.create_task(run_dynamic_spider_from_db(pool))
+        asyncio.create_task(
+            run_dynamic_spider_from_db(pool, output_writer.queue, spider_pool)
+        )
         logger.info("[Startup] Dynamic spider from DB started.")
     else:
         logger.warning("[Startup] DB-based scraper not started (no DB).")
@@ -143,6 +186,10 @@ async def lifespan(app: FastAPI):
     logger.info("[Lifespan] Application shutting down.")
     if pool:
         await pool.close()
+    await close_http_client()
+    spider_pool.close()
+    stop_crawler_service()
+    output_writer.stop()
 
 
 # FastAPI app instance
@@ -0,0 +1,56 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-18 16:05:12
+# @ Project: Cebolla
+# @ Description: Tests of the crawl profile file parsing of
+# `app.scraping.crawl_profiles.load_crawl_profile`.
+#
+# Run from Scraping_web/src:
+#   python -m pytest tests
+
+import json
+
+import pytest
+
+from app.scraping.crawl_profiles import DEFAULT_PROFILE, PROFILES, load_crawl_profile
+
+
+def write_config(tmp_path, content: str) -> str:
+    path = tmp_path / "crawl_profile.json"
+    path.write_text(content, encoding="utf-8")
+    return str(path)
+
+
+def test_missing_file_uses_default(tmp_path):
+    assert load_crawl_profile(str(tmp_path / "missing.json")) == (
+        DEFAULT_PROFILE, PROFILES[DEFAULT_PROFILE]
+    )
+
+
+def test_profile_and_overrides(tmp_path):
+    config = {"profile": "aggressive", "overrides": {"CONCURRENT_REQUESTS": 128}}
+    name, settings = load_crawl_profile(write_config(tmp_path, json.dumps(config)))
+    assert name == "aggressive"
+    assert settings["CONCURRENT_REQUESTS"] == 128
+    assert settings["DOWNLOAD_TIMEOUT"] == PROFILES["aggressive"]["DOWNLOAD_TIMEOUT"]
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    '["aggressive"]',
+    '"aggressive"',
+    "42",
+    "null",
+    '{"profile": "turbo"}',
+    '{"profile": ["aggressive"]}',
+])
+def test_invalid_config_uses_default(tmp_path, content):
+    assert load_crawl_profile(write_config(tmp_path, content)) == (
+        DEFAULT_PROFILE, PROFILES[DEFAULT_PROFILE]
+    )
+
+
+def test_invalid_overrides_are_ignored(tmp_path):
+    config = {"profile": "polite", "overrides": ["CONCURRENT_REQUESTS"]}
+    assert load_crawl_profile(write_config(tmp_path, json.dumps(config))) == (
+        "polite", PROFILES["polite"]
+    )
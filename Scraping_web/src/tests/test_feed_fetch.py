@@ -0,0 +1,104 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-18 16:40:27
+# @ Project: Cebolla
+# @ Description: Tests of the conditional feed downloads of
+# `app.scraping.feed_fetch` and their per-consumer cache.
+#
+# The HTTP client is replaced by an httpx client on a mock transport serving
+# one feed with an ETag, answering 304 when the request sends it back.
+#
+# Run from Scraping_web/src:
+#   python -m pytest tests
+
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+
+from app.models.feed_cache import FeedCache
+from app.scraping import feed_fetch
+from app.scraping.feed_fetch import CHANGED, NOT_MODIFIED, UNCHANGED, commit_feed, fetch_feed
+
+FEED_URL = "https://example.com/feed.xml"
+FEED_BODY = b"<rss><channel><title>Example</title></channel></rss>"
+ETAG = '"v1"'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = FeedCache(str(tmp_path / "feed_cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == ETAG:
+            return httpx.Response(304)
+        return httpx.Response(200, content=FEED_BODY, headers={"etag": ETAG})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(feed_fetch, "get_http_client", lambda: client)
+    yield requests
+    asyncio.run(client.aclose())
+
+
+def fetch(cache, consumer):
+    return asyncio.run(fetch_feed(FEED_URL, consumer, cache))
+
+
+def test_consumers_do_not_share_the_cache(cache, server):
+    first = fetch(cache, "saved_links")
+    assert first.status == CHANGED
+    commit_feed(first, "Example", cache)
+
+    # Processed by "saved_links" only: still new for the other consumer
+    other = fetch(cache, "rss_feeds")
+    assert other.status == CHANGED
+    assert other.body == FEED_BODY
+    assert "if-none-match" not in server[-1].headers
+
+    assert fetch(cache, "saved_links").status == NOT_MODIFIED
+    commit_feed(other, "Example", cache)
+    assert fetch(cache, "rss_feeds").status == NOT_MODIFIED
+
+
+def test_uncommitted_feed_is_fetched_in_full(cache, server):
+    assert fetch(cache, "google_alerts").status == CHANGED
+    # Not committed (e.g. processing failed): fetched again in full
+    assert fetch(cache, "google_alerts").status == CHANGED
+
+
+def test_same_body_is_unchanged(cache, server):
+    first = fetch(cache, "google_alerts")
+    commit_feed(first, "Example", cache)
+    # Server ignoring the validators: same body, not parsed again
+    cache.store("google_alerts", FEED_URL, None, None, first.body_hash, None)
+    again = fetch(cache, "google_alerts")
+    assert again.status == UNCHANGED
+    assert again.cached_title == "Example"
+
+
+def test_former_table_is_replaced(tmp_path):
+    path = str(tmp_path / "feed_cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE feed_cache (url TEXT PRIMARY KEY, etag TEXT, "
+        "last_modified TEXT, body_hash TEXT, title TEXT, updated_at REAL NOT NULL)"
+    )
+    conn.execute("INSERT INTO feed_cache VALUES (?, ?, NULL, NULL, NULL, 0)", (FEED_URL, ETAG))
+    conn.commit()
+    conn.close()
+
+    cache = FeedCache(path)
+    try:
+        assert cache.get("rss_feeds", FEED_URL) is None
+        cache.store("rss_feeds", FEED_URL, ETAG, None, "hash", "Example")
+        assert cache.get("rss_feeds", FEED_URL).etag == ETAG
+    finally:
+        cache.close()
@@ -0,0 +1,82 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-18 10:12:40
+# @ Project: Cebolla
+# @ Description: Parity tests of the HTML parser backends of
+# `app.scraping.html_extract.extract_page`.
+#
+# Every backend must return the same dictionary as the "bs4" reference (the
+# former news_gd parser) on the pages of tests/fixtures/html, which cover
+# inline scripts and styles, comments and nested inline markup.
+#
+# Run from Scraping_web/src:
+#   python -m pytest tests
+
+from pathlib import Path
+
+import pytest
+
+from app.scraping.html_extract import PARSER_BACKENDS, extract_page
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "html"
+FIXTURES = sorted(FIXTURES_DIR.glob("*.html"))
+REFERENCE_BACKEND = "bs4"
+OTHER_BACKENDS = [name for name in PARSER_BACKENDS if name != REFERENCE_BACKEND]
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("backend", OTHER_BACKENDS)
+@pytest.mark.parametrize("fixture", FIXTURES, ids=lambda path: path.name)
+def test_backend_matches_reference(fixture, backend):
+    html = fixture.read_text(encoding="utf-8")
+    expected = extract_page(html, "https://example.com/", "Untitled", backend=REFERENCE_BACKEND)
+    assert extract_page(html, "https://example.com/", "Untitled", backend=backend) == expected
+
+
+@pytest.mark.parametrize("backend", list(PARSER_BACKENDS))
+def test_script_style_and_template_text_is_skipped(backend):
+    page = extract_page(read_fixture("inline_scripts.html"), "u", backend=backend)
+    assert page["title"] == "Ransomware hits hospital"
+    assert page["h1"] == ["Ransomware attack"]
+    assert page["p"] == [
+        "The attackers encrypted patient records.",
+        "Read more below.Enable JavaScript",
+        "Before after",
+    ]
+
+
+@pytest.mark.parametrize("backend", list(PARSER_BACKENDS))
+def test_comments_are_skipped(backend):
+    page = extract_page(read_fixture("comments.html"), "u", backend=backend)
+    assert page["title"] == "Zero-day report"
+    assert page["h2"] == ["Vulnerability disclosed"]
+    assert page["p"] == ["Firstparagraph"]
+    assert page["h3"] == ["Timeline"]
+
+
+@pytest.mark.parametrize("backend", list(PARSER_BACKENDS))
+def test_nested_markup_is_flattened(backend):
+    page = extract_page(read_fixture("nested_markup.html"), "u", backend=backend)
+    assert page["title"] == "Weekly threat digest"
+    assert page["h2"] == ["APT group APT29 returns"]
+    assert page["p"] == [
+        "Researchers observed new spear-phishing waves targeting ministries.",
+        "Nested inside two spans.",
+        "Quoted paragraph with code()",
+    ]
+    assert page["h4"] == []
+    assert page["h6"] == ["Footer & legal © 2025"]
+
+
+@pytest.mark.parametrize("backend", list(PARSER_BACKENDS))
+def test_default_title(backend):
+    page = extract_page(read_fixture("no_title.html"), "u", "Untitled", backend=backend)
+    assert page["title"] == "Untitled"
+    assert page["h1"] == ["Breaking: botnet takedown"]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        extract_page("<p>x</p>", "u", backend="html5lib")
@@ -0,0 +1,84 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-18 17:21:54
+# @ Project: Cebolla
+# @ Description: Tests of the item outcomes of
+# `app.models.opensearh_db.OpenSearchBulkWriter`.
+#
+# The OpenSearch client is replaced by a fake one answering each bulk
+# request with the item status scripted for every document text, so the
+# writer can be checked without a cluster: transient statuses are retried
+# and counted in `failed` once the retries are exhausted, permanent ones are
+# counted in `rejected` right away.
+#
+# Run from Scraping_web/src:
+#   python -m pytest tests
+
+import json
+
+import pytest
+
+from app.models import opensearh_db
+from app.models.opensearh_db import OpenSearchBulkWriter
+
+
+class FakeClient:
+    def __init__(self, statuses):
+        # Per text: list of statuses returned by successive attempts
+        self.statuses = statuses
+        self.requests = 0
+
+    def bulk(self, body):
+        self.requests += 1
+        lines = body.strip().split("\n")
+        items = []
+        for action, source in zip(lines[::2], lines[1::2]):
+            op_type, meta = next(iter(json.loads(action).items()))
+            script = self.statuses[json.loads(source)["text"]]
+            status = script.pop(0) if len(script) > 1 else script[0]
+            result = {"_id": meta.get("_id"), "status": status}
+            if status >= 300:
+                result["error"] = {"type": f"status_{status}"}
+            items.append({op_type: result})
+        return {"items": items}
+
+
+@pytest.fixture
+def make_writer(monkeypatch):
+    def make(statuses, op_type="create"):
+        client = FakeClient(statuses)
+        monkeypatch.setattr(opensearh_db, "get_opensearch_client", lambda host, port: client)
+        writer = OpenSearchBulkWriter(
+            "localhost", 9200, "spacy_documents", op_type=op_type,
+            flush_interval=60, max_retries=2, retry_backoff=0,
+        )
+        return writer, client
+    return make
+
+
+def write(writer, texts):
+    with writer:
+        for text in texts:
+            writer.add({"text": text})
+
+
+def test_item_outcomes(make_writer):
+    writer, client = make_writer({
+        "new": [201],
+        "stored": [409],
+        "throttled once": [429, 201],
+        "too long": [400],
+        "server down": [503],
+    })
+    write(writer, ["new", "stored", "throttled once", "too long", "server down"])
+    assert writer.indexed == 2
+    assert writer.skipped == 1
+    assert writer.rejected == 1
+    assert writer.failed == 1
+    assert client.requests == 3
+
+
+def test_permanent_rejection_is_not_retried(make_writer):
+    writer, client = make_writer({"mapping error": [400, 201]})
+    write(writer, ["mapping error"])
+    assert (writer.indexed, writer.rejected, writer.failed) == (0, 1, 0)
+    assert client.requests == 1
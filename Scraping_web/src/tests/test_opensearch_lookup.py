@@ -0,0 +1,68 @@
+# @ Author: naflashDev
+# @ Create Time: 2026-10-18 17:48:09
+# @ Project: Cebolla
+# @ Description: Tests of `app.models.opensearh_db.texts_existing_in_opensearch`.
+#
+# The fake client holds documents stored under the deterministic text hash
+# (found by mget) and documents indexed before it with random IDs (only
+# found by the text.keyword search), some of them stored twice.
+#
+# Run from Scraping_web/src:
+#   python -m pytest tests
+
+import pytest
+
+from app.models import opensearh_db
+from app.models.opensearh_db import KEYWORD_IGNORE_ABOVE, text_hash, texts_existing_in_opensearch
+
+
+class FakeClient:
+    def __init__(self, by_id, legacy):
+        self.by_id = by_id
+        self.legacy = legacy
+        self.searches = []
+
+    def mget(self, index, body, _source):
+        return {"docs": [{"_id": doc_id, "found": doc_id in self.by_id} for doc_id in body["ids"]]}
+
+    def search(self, index, body):
+        self.searches.append(body)
+        wanted = body["query"]["terms"]["text.keyword"]
+        hits, seen = [], set()
+        for text in self.legacy:
+            if text in wanted and text not in seen:
+                seen.add(text)
+                hits.append({"_source": {"text": text}})
+        return {"hits": {"hits": hits[:body["size"]]}}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = FakeClient(
+        by_id={text_hash("hashed text")},
+        legacy=["legacy text", "legacy text", "other legacy text"],
+    )
+    monkeypatch.setattr(opensearh_db, "get_opensearch_client", lambda host, port: client)
+    return client
+
+
+def test_finds_hashed_and_legacy_documents(client):
+    texts = ["hashed text", "legacy text", "other legacy text", "new text"]
+    assert texts_existing_in_opensearch(texts, "localhost", 9200) == {
+        "hashed text", "legacy text", "other legacy text"
+    }
+    # Only the texts missed by mget are searched
+    assert client.searches[0]["query"]["terms"]["text.keyword"] == [
+        "legacy text", "other legacy text", "new text"
+    ]
+
+
+def test_no_search_when_every_text_is_hashed(client):
+    assert texts_existing_in_opensearch(["hashed text"], "localhost", 9200) == {"hashed text"}
+    assert client.searches == []
+
+
+def test_texts_over_the_keyword_limit_are_not_searched(client):
+    long_text = "x" * (KEYWORD_IGNORE_ABOVE + 1)
+    assert texts_existing_in_opensearch([long_text], "localhost", 9200) == set()
+    assert client.searches == []